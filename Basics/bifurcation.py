@@ -3,17 +3,20 @@ from matplotlib.pyplot import figure, show, cm
 
 import full_henon as fh
 import helper as he
+import divergence as dv
 
 def henon_bifurc(start, end, iterations, accuracy=1000, cut=950, bvalue=0.3):
     """ Function that generates data to plot the bifurcation of the Hénon map. 
         The first step is generating the values of the parameter "a", and 
         generating an equal amount of random x and y starting points. Then the 
         map is iterated a number of times, given by the input parameter 
-        "accuracy". If the points do not diverge, then the last few points are 
-        taken and added to a list. The number of points that are added are given 
-        by accuracy - cut. Finally the number of x points is defined, which has 
-        the same length as the number of y points and ranges from the minimum to 
-        the maximum value of the parameter a. This can be used for plotting.
+        "accuracy", for all values of "a" at once. The last accuracy - cut x 
+        values of every orbit are stored in a preallocated array; orbits that 
+        provably escape (see divergence.escape_radius) get NaN. The "a" value 
+        of every point is a read-only broadcast view of apoints, so it takes 
+        no extra memory as long as it is kept 2D (matplotlib accepts it as 
+        is); flattening it with ravel() makes a full copy. ypoints is 
+        contiguous, so ypoints.ravel() is a view.
         
         Input:  start      = lower boundary for "a" parameter value (float);
                 end        = upper boundary for "a" parameter value (float);
@@ -23,37 +26,36 @@ def henon_bifurc(start, end, iterations, accuracy=1000, cut=950, bvalue=0.3):
                 bvalue     = value of the "b" parameter (float);
                 
         Returns: apoints   = used "a" parameters (array);
-                 xpoints   = "a" parameter values for plotting (array);
-                 ypoints   = calculated x points of Hénon map (array).
+                 xpoints   = "a" parameter of every point, shape (iterations, 
+                             accuracy-cut), read-only view (array);
+                 ypoints   = calculated x points of Hénon map, same shape, NaN 
+                             for diverging orbits (array).
     """
     
     # Generating the 'a' parameter points
     apoints = np.linspace(start, end, iterations)
     
     # Generating the random starting points of the Hénon map
-    x_starting = np.random.uniform(-1, 1, size=iterations)
-    y_starting = np.random.uniform(-1, 1, size=iterations)
+    x = np.random.uniform(-1, 1, size=iterations)
+    y = np.random.uniform(-1, 1, size=iterations)
     
-    # List to put the results in
-    ypoints = []
+    ypoints = np.full((iterations, accuracy-cut), np.nan)
+    alive = np.ones(iterations, dtype=bool)             # Not escaped
+    R = dv.escape_radius(apoints, bvalue)
     
-    # Looping over all values of the 'a' parameter
-    for ind, a in enumerate(apoints):   
-        # Finding the x and y values of the Hénon map
-        xvals, yvals = fh.Henon(x_starting[ind], y_starting[ind], accuracy, a, 
-                                bvalue, div=True)
+    # Iterating all values of the 'a' parameter together
+    for n in range(accuracy):
+        x, y = y + 1 - apoints * x * x, bvalue * x
         
-        # Adding the values to the list
-        if xvals != None:
-            xred = xvals[cut:]      # Using accuracy-cut values
-            for i in xred: 
-                ypoints.append(i)
-        else:
-            for i in range(int(accuracy-cut)):
-                ypoints.append(None)
-    
-    # For plotting the length of x and y data sets must be equal
-    xpoints = np.linspace(start, end, len(ypoints))
+        alive &= ~((np.abs(x) > R) & (np.abs(y) <= np.abs(bvalue * x)))
+        x, y = np.where(alive, x, 0), np.where(alive, y, 0) # No overflow
+        
+        if n >= cut: ypoints[:,n-cut] = x
+    
+    ypoints[~alive] = np.nan
+    
+    # The 'a' value of every point, a view as long as it is not flattened
+    xpoints = np.broadcast_to(apoints[:,None], ypoints.shape)
     
     return apoints, xpoints, ypoints
 
@@ -62,7 +64,9 @@ def bifurc_grid(aSize, xSize, aLim, xLim, acc=1000, bV=0.3):
     """ Function that plots the bifurcation diagram as a 2D grid instead of all 
         separate points. This results in a higher resolution and much smaller 
         image size. For large grid sizes and number of iterations the 
-        computation time can be long.
+        computation time can be long. The 7 orbits of a column are iterated 
+        together; orbits that provably escape (see divergence.escape_radius) 
+        are left out of the column.
     """
     
     grid = np.zeros((xSize, aSize))                     # Creating the grid
@@ -76,21 +80,33 @@ def bifurc_grid(aSize, xSize, aLim, xLim, acc=1000, bV=0.3):
         print(f"Processing {ind} out of {aSize}")
         aV = aPoints[ind]                               # Improved speed
         extraA = np.linspace(aV-colW, aV+colW, 7)       # Creating extra a vals
+        R = dv.escape_radius(extraA, bV)
         
-        xS = np.random.uniform(-1, 1, 7)                # Random x start
-        yS = np.random.uniform(-1, 1, 7)                # Random y start
+        x = np.random.uniform(-1, 1, 7)                 # Random x start
+        y = np.random.uniform(-1, 1, 7)                 # Random y start
         
-        for aInd in range(len(extraA)):                 # Looping over a values
-            xV, yV = fh.Henon(xS[aInd], yS[aInd], acc, extraA[aInd], bV, 
-                              div=True, threshold=10)   # Henon map
-            
-            if xV:                                      # if xV != None
-                xRed = xV[redF:]                        # Throwing away points
-                
-                for x in xRed:                          # Remaining points
-                    val, xInd = he.take_closest(xPoints, x)
-                    grid[xInd][ind] += 1
+        xV = np.zeros((acc+1, 7))                       # All x values
+        xV[0] = x
+        alive = np.ones(7, dtype=bool)                  # Not escaped
+        
+        for n in range(1, acc+1):
+            x, y = y + 1 - extraA * x * x, bV * x
             
+            absX = np.abs(x)
+            alive &= (absX <= R) | (np.abs(y) > abs(bV) * absX)
+            x, y = x * alive, y * alive                 # No overflow
+            xV[n] = x
+        
+        xRed = xV[redF:, alive].ravel()                 # Throwing away points
+        
+        # Closest x point of every value, the lower one for ties
+        pos = np.searchsorted(xPoints, xRed)
+        inner = np.clip(pos, 1, xSize-1)
+        after = xPoints[inner] - xRed < xRed - xPoints[inner-1]
+        xInd = np.where(pos == 0, 0, np.where(pos == xSize, xSize-1, 
+                                              np.where(after, inner, inner-1)))
+        
+        grid[:,ind] += np.bincount(xInd, minlength=xSize)
     
     return grid
 
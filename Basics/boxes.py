@@ -3,6 +3,7 @@ from math import ceil
 from matplotlib.pyplot import figure, show, vlines, hlines, savefig
 
 from full_attractor import Henon
+import cache as ca
 
 def cut_interval(X_Lim, Y_Lim, X_Points, Y_Points):
     """ Function that selects the points of a set of points - for example the Hénon attractor - that
@@ -218,8 +219,10 @@ def create_box_grid(boxes, xpoints, ypoints, base_xsize=7, basic=True, saveFig=N
     if saveFig: fig.savefig(saveFig)
     else: show()
 
-def main():
-    """ Main function that will be executed """
+def main(cache=False):
+    """ Main function that will be executed, if 'cache' is True the points of 
+        the attractor are stored on disk and reused (see cache.py).
+    """
     # The starting values, iterations and parameter values for the Hénon attractor
     X0 = Y0 = 0
     It = int(1e5)
@@ -227,7 +230,8 @@ def main():
     Bv = 0.3
     
     # Calculating the points of the Hénon attractor
-    xValues, yValues = Henon(X0, Y0, It, Av, Bv)
+    if cache: xValues, yValues = ca.cached_call(Henon, X0, Y0, It, Av, Bv)
+    else: xValues, yValues = Henon(X0, Y0, It, Av, Bv)
     
     # The limits of the boxes
     box1 = {'x': (0, 0.5), 'y': (0.15, 0.28)}
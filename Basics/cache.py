@@ -0,0 +1,279 @@
+import os
+import sys
+import time
+import pickle
+import hashlib
+import inspect
+import tempfile
+
+# Location and maximum total size (bytes) of the cache on disk
+CACHE_DIR = os.environ.get("HENON_CACHE",
+                           os.path.join(os.path.expanduser("~"), ".henon_cache"))
+MAX_SIZE = int(2e9)
+
+# Modules within this folder count as project code for the code version
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Code version of every module, computed once per process
+versions = {}
+
+# Hits and misses of the current process
+stats = {"hits": 0, "misses": 0}
+
+
+def project_modules(module, found=None):
+    """ Function that finds a module and all project modules it uses,
+        directly or through other project modules; these are the modules
+        whose file lies in the project folder and that are referenced from
+        the module, either as a module or through one of their functions or
+        classes.
+
+        Input:      module = the module (module);
+                    found  = modules found so far (dictionary);
+
+        Returns:    found  = the project modules by file name (dictionary).
+    """
+
+    if found is None: found = {}
+
+    fname = getattr(module, "__file__", None)
+    if fname is None: return found
+
+    fname = os.path.abspath(fname)
+    if not fname.startswith(PROJECT_DIR + os.sep) or fname in found:
+        return found
+    found[fname] = module
+
+    for value in list(vars(module).values()):
+        if inspect.ismodule(value): other = value
+        elif inspect.isfunction(value) or inspect.isclass(value):
+            other = sys.modules.get(value.__module__)
+        else: continue
+
+        if other is not None: project_modules(other, found)
+
+    return found
+
+
+def code_version(func):
+    """ Function that calculates the version of the code of a function; the
+        hash of the source files of its module and of all project modules
+        that module uses (see project_modules). Any change in the code that
+        the function can call therefore results in a new version, and old
+        results are no longer used. Functions outside of the project are
+        versioned by their own source.
+    """
+
+    module = sys.modules.get(func.__module__)
+    if module is None or not project_modules(module):
+        try: code = inspect.getsource(func).encode()
+        except (OSError, TypeError): code = func.__code__.co_code
+        return hashlib.sha256(code).hexdigest()[:16]
+
+    if module.__name__ not in versions:
+        digest = hashlib.sha256()
+        for fname in sorted(project_modules(module)):
+            with open(fname, "rb") as f: digest.update(f.read())
+        versions[module.__name__] = digest.hexdigest()[:16]
+
+    return versions[module.__name__]
+
+
+def cache_key(func, args, kwargs, version=None):
+    """ Function that creates the content address of a function call. The key
+        is the hash of the name of the function, the version of its code and
+        all (keyword) arguments, so equal calls result in equal keys.
+
+        Input:      func    = the function that is called (function);
+                    args    = positional arguments of the call (tuple);
+                    kwargs  = keyword arguments of the call (dictionary);
+                    version = code version, see code_version (string);
+
+        Returns:    key     = hexadecimal hash of the call (string).
+    """
+
+    if version is None: version = code_version(func)
+
+    name = f"{func.__module__}.{func.__qualname__}"
+    content = pickle.dumps((name, version, args, sorted(kwargs.items())),
+                           protocol=4)
+
+    return hashlib.sha256(content).hexdigest()
+
+
+def cache_path(key, cacheDir=None):
+    """ Path of the file belonging to a key """
+
+    cacheDir = cacheDir or CACHE_DIR
+    return os.path.join(cacheDir, key[:2], key + ".pkl")
+
+
+def store(path, result):
+    """ Function that writes a result to the cache and returns the size of
+        the file. The result is first written to a temporary file in the
+        same directory which is then renamed, so other processes never read
+        a partially written file.
+    """
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmpName = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        size = os.path.getsize(tmpName)
+        os.replace(tmpName, path)               # Atomic
+
+    except BaseException:
+        if os.path.exists(tmpName): os.remove(tmpName)
+        raise
+
+    return size
+
+
+def cached_call(func, *args, cacheVersion=None, cacheDir=None, maxSize=None,
+                **kwargs):
+    """ Function that calls 'func' with the given arguments, unless the same
+        call has been made before; in that case the stored result is loaded
+        from disk. Every hit marks the entry as recently used. The total size
+        of the cache is kept in an index file (see add_size); only when a
+        new result makes it exceed 'maxSize' is the cache scanned and are
+        the least recently used entries removed.
+
+        Input:      func         = the function that is called (function);
+                    args         = positional arguments of the function;
+                    cacheVersion = code version, by default the hash of the
+                                   project code it uses (string);
+                    cacheDir     = directory of the cache (string);
+                    maxSize      = maximum total size in bytes (int);
+                    kwargs       = keyword arguments of the function;
+
+        Returns:    result       = the result of the function call.
+    """
+
+    path = cache_path(cache_key(func, args, kwargs, cacheVersion), cacheDir)
+
+    try:
+        with open(path, "rb") as f: result = pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError): pass
+    else:
+        try: os.utime(path)                     # Recently used
+        except FileNotFoundError: pass          # Removed by other process
+        stats["hits"] += 1
+        return result
+
+    stats["misses"] += 1
+
+    result = func(*args, **kwargs)
+    total = add_size(store(path, result), cacheDir)
+
+    maxSize = MAX_SIZE if maxSize is None else maxSize
+    if total > maxSize: evict(cacheDir, maxSize)
+
+    return result
+
+
+def memoize(cacheVersion=None, cacheDir=None, maxSize=None):
+    """ Decorator version of 'cached_call' """
+
+    def decorator(func):
+        def wrapper(*args, **kwargs):
+            return cached_call(func, *args, cacheVersion=cacheVersion,
+                               cacheDir=cacheDir, maxSize=maxSize, **kwargs)
+
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        return wrapper
+
+    return decorator
+
+
+def index_path(cacheDir=None):
+    """ Path of the index file with the total size of the cache """
+    return os.path.join(cacheDir or CACHE_DIR, "size.txt")
+
+
+def write_size(total, cacheDir=None):
+    """ Write the total size to the index file, atomically """
+
+    cacheDir = cacheDir or CACHE_DIR
+    os.makedirs(cacheDir, exist_ok=True)
+    fd, tmpName = tempfile.mkstemp(dir=cacheDir, suffix=".idx")
+
+    with os.fdopen(fd, "w") as f: f.write(str(int(total)))
+    os.replace(tmpName, index_path(cacheDir))
+
+
+def add_size(size, cacheDir=None):
+    """ Function that adds the size of a new entry to the running total in
+        the index file and returns the new total. The file is created from
+        a scan of the cache when it does not exist. Updates of processes
+        that write at the same moment can get lost, so the total is an
+        estimate; it is made exact again by every eviction.
+    """
+
+    try:
+        with open(index_path(cacheDir)) as f: total = int(f.read()) + size
+    except (FileNotFoundError, ValueError):
+        total = sum(e[1] for e in entries(cacheDir) if e[2].endswith(".pkl"))
+
+    write_size(total, cacheDir)
+    return total
+
+
+def entries(cacheDir=None):
+    """ All entries and temporary files in the cache with their last use and
+        size
+    """
+
+    cacheDir = cacheDir or CACHE_DIR
+    found = []
+
+    for root, dirs, files in os.walk(cacheDir):
+        for name in files:
+            if not name.endswith((".pkl", ".tmp")): continue
+            path = os.path.join(root, name)
+            try: info = os.stat(path)
+            except FileNotFoundError: continue  # Removed by other process
+
+            found.append((info.st_mtime, info.st_size, path))
+
+    return found
+
+
+def evict(cacheDir=None, maxSize=None, tmpAge=3600):
+    """ Function that removes the least recently used entries until the total
+        size of the cache is below 'maxSize'. Temporary files older than
+        'tmpAge' seconds are left over by crashed processes and are removed
+        as well. Afterwards the index file holds the exact total size.
+    """
+
+    maxSize = MAX_SIZE if maxSize is None else maxSize
+    found = sorted(entries(cacheDir))           # Oldest first
+    total = sum(size for mtime, size, path in found if path.endswith(".pkl"))
+    now = time.time()
+
+    for mtime, size, path in found:
+        if path.endswith(".tmp"):
+            if now - mtime <= tmpAge: continue  # Still being written
+        elif total <= maxSize: continue
+        else: total -= size
+
+        try: os.remove(path)
+        except FileNotFoundError: pass          # Removed by other process
+
+    if os.path.isdir(cacheDir or CACHE_DIR): write_size(total, cacheDir)
+
+
+def cache_stats(cacheDir=None):
+    """ Hits and misses of this process and the number and size of entries """
+
+    found = [e for e in entries(cacheDir) if e[2].endswith(".pkl")]
+
+    return {"hits": stats["hits"], "misses": stats["misses"],
+            "entries": len(found), "size": sum(e[1] for e in found)}
+
+
+def clear_cache(cacheDir=None):
+    """ Remove all entries from the cache """
+    evict(cacheDir, maxSize=0)
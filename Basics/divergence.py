@@ -0,0 +1,149 @@
+import numpy as np
+
+import helper as he
+import trapping as tr
+
+
+def escape_radius(a, b):
+    """ Function that calculates the escape radius of the Hénon map. If
+        |x| > R and |y| <= |b| |x|, then |x'| >= a x**2 - (1 + |b|) |x| - 1 > |x|
+        and |y'| = |b| |x| <= |b| |x'|, so the orbit stays in this region while
+        |x| grows without bound; such an orbit provably diverges. R is the
+        positive root of a x**2 - (1 + |b|) x - 1. For a <= 0 there is no
+        escape radius and infinity is returned.
+
+        Input:      a = a parameter of the Hénon map (float or numpy array);
+                    b = b parameter of the Hénon map (float or numpy array);
+
+        Returns:    R = the escape radius (float or numpy array).
+    """
+
+    a, c = np.asarray(a, dtype=float), 1 + np.abs(b)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        R = (c + np.sqrt(c*c + 4*a)) / (2*a)
+
+    return np.where(a > 0, R, np.inf)
+
+
+def maps_into(a, b, vertices=None):
+    """ Function that checks exactly whether the Hénon map sends a convex
+        quadrilateral (by default the trapping region) into itself. Since the
+        map is a homeomorphism for b != 0, it suffices that the image of the
+        boundary lies inside. Along an edge P + s (Q - P) the image is
+        quadratic in s, so the signed distance of the image to every side of
+        the quadrilateral is a quadratic in s; its maximum on [0, 1] lies at
+        an end point or at the top of the parabola.
+
+        Input:      a        = a parameter of the Hénon map (float or array);
+                    b        = b parameter of the Hénon map (float or array);
+                    vertices = vertices of the quadrilateral (list);
+
+        Returns:    inside   = whether the image lies inside (boolean or array).
+    """
+
+    if vertices is None: vertices = tr.trapp_region(output=True)[0]
+
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=float),
+                               np.asarray(b, dtype=float))
+    verts = np.asarray(vertices, dtype=float)
+    nVert = len(verts)
+
+    # Orientation of the quadrilateral, for the outward normals
+    area = np.sum(verts[:,0] * np.roll(verts[:,1], -1)
+                  - np.roll(verts[:,0], -1) * verts[:,1])
+    sign = 1 if area > 0 else -1
+
+    inside = np.ones(a.shape, dtype=bool)
+
+    for i in range(nVert):                          # Edges that are mapped
+        (px, py), (qx, qy) = verts[i], verts[(i+1) % nVert]
+        dx, dy = qx - px, qy - py
+
+        # Image of the edge: x' = x0 + x1 s + x2 s**2, y' = y0 + y1 s
+        x0, x1, x2 = 1 + py - a*px*px, dy - 2*a*px*dx, -a*dx*dx
+        y0, y1 = b * px, b * dx
+
+        for j in range(nVert):                      # Sides of the region
+            (ux, uy), (vx, vy) = verts[j], verts[(j+1) % nVert]
+            nx, ny = sign * (vy - uy), -sign * (vx - ux)    # Outward normal
+
+            # Signed distance along the normal, positive is outside
+            c0 = nx * (x0 - ux) + ny * (y0 - uy)
+            c1 = nx * x1 + ny * y1
+            c2 = nx * x2
+
+            top = c0 + c1 + c2                      # Value at s = 1
+            top = np.maximum(top, c0)               # Value at s = 0
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                sTop = -c1 / (2 * c2)
+            inner = (c2 < 0) & (sTop > 0) & (sTop < 1)
+            top = np.where(inner, np.maximum(top, c0 - c1*c1 / (4*c2)), top)
+
+            inside &= top <= 0
+
+    return inside if inside.ndim else bool(inside)
+
+
+def escape_time(xS, yS, a, b, nMax=1000, vertices=None, trapped=True):
+    """ Function that classifies an ensemble of orbits as escaping or bounded,
+        stopping every orbit as soon as its fate is certain. An orbit escapes
+        once it enters the escape region (see escape_radius) or becomes non
+        finite; it is bounded once it enters a quadrilateral that the map
+        sends into itself (see maps_into). Only undecided orbits are
+        iterated, so the work drops as the ensemble gets decided.
+
+        Input:      xS       = initial x conditions (numpy array);
+                    yS       = initial y conditions (numpy array);
+                    a        = a parameter of the Hénon map (float or array);
+                    b        = b parameter of the Hénon map (float or array);
+                    nMax     = maximum number of iterations (int);
+                    vertices = vertices of the quadrilateral (list);
+                    trapped  = whether orbits entering the quadrilateral are
+                               declared bounded (boolean);
+
+        Returns:    status   = 1 for escaping, 0 for trapped orbits and -1 for
+                               orbits undecided after nMax iterations (array);
+                    steps    = number of iterations until the orbit was
+                               decided, nMax if undecided (numpy array).
+    """
+
+    if vertices is None: vertices = tr.trapp_region(output=True)[0]
+
+    shape = np.broadcast(xS, yS, a, b).shape
+    x, y, a, b = [np.array(v, dtype=float).ravel() for v in
+                  np.broadcast_arrays(xS, yS, a, b)]
+
+    R = escape_radius(a, b)
+    trap = maps_into(a, b, vertices) if trapped else np.zeros(len(x), bool)
+
+    status = np.full(len(x), -1)
+    steps = np.full(len(x), nMax)
+    active = np.arange(len(x))                      # Undecided orbits
+
+    with np.errstate(over="ignore", invalid="ignore"):
+        for n in range(nMax+1):
+            xa, ya = x[active], y[active]
+
+            # Checking the fate of the undecided orbits
+            esc = ~np.isfinite(xa) | ~np.isfinite(ya) | \
+                  ((np.abs(xa) > R[active]) &
+                   (np.abs(ya) <= np.abs(b[active] * xa)))
+            bnd = trap[active] & ~esc
+            if bnd.any():
+                bnd[bnd] = he.inside_polygon(xa[bnd], ya[bnd], vertices)
+
+            status[active[esc]] = 1
+            status[active[bnd]] = 0
+            steps[active[esc | bnd]] = n
+
+            active = active[~(esc | bnd)]
+            if len(active) == 0 or n == nMax: break
+
+            # Iterating the undecided orbits
+            xa, ya = x[active], y[active]
+            x[active] = 1 + ya - a[active] * xa * xa
+            y[active] = b[active] * xa
+
+    return status.reshape(shape), steps.reshape(shape)
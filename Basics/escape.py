@@ -0,0 +1,181 @@
+from multiprocessing import Pool
+import numpy as np
+from matplotlib.pyplot import figure, show
+
+import divergence as dv
+
+
+def escape_chunk(seed, nPoints, a, b, nMax, xLim, yLim):
+    """ Function that draws one chunk of initial conditions uniformly from
+        the box xLim x yLim and records when they escape (see
+        divergence.escape_time); only the histogram of the escape times is
+        kept.
+
+        Input:      seed    = seed of the chunk (numpy SeedSequence or int);
+                    nPoints = number of initial conditions (int);
+                    a       = a parameter of the Hénon map (float);
+                    b       = b parameter of the Hénon map (float);
+                    nMax    = maximum number of iterations (int);
+                    xLim    = range of the initial x conditions (tuple);
+                    yLim    = range of the initial y conditions (tuple);
+
+        Returns:    hist    = number of orbits escaping after n iterations,
+                              for n = 0 ... nMax (numpy array);
+                    nLeft   = number of orbits that did not escape (int).
+    """
+
+    rng = np.random.default_rng(seed)
+    xS = rng.uniform(xLim[0], xLim[1], nPoints)
+    yS = rng.uniform(yLim[0], yLim[1], nPoints)
+
+    status, steps = dv.escape_time(xS, yS, a, b, nMax, trapped=False)
+    esc = status == 1
+
+    return np.bincount(steps[esc], minlength=nMax+1), np.count_nonzero(~esc)
+
+
+def escape_histogram(a, b=0.3, nPoints=int(1e7), nMax=int(1e4), nProc=1,
+                     chunk=int(1e5), xLim=(-1.33, 1.32), yLim=(-0.5, 0.42),
+                     seed=0):
+    """ Function that calculates the histogram of escape times of a large
+        ensemble of initial conditions, for instance just past the boundary
+        crisis where orbits linger near the former attractor before they
+        escape. The ensemble is split into chunks of 'chunk' orbits which are
+        divided over 'nProc' processes, so the memory is bounded by the chunk
+        size; every chunk gets its own child of one SeedSequence, so the
+        result does not depend on nProc.
+
+        Input:      a       = a parameter of the Hénon map (float);
+                    b       = b parameter of the Hénon map (float);
+                    nPoints = number of initial conditions (int);
+                    nMax    = maximum number of iterations (int);
+                    nProc   = number of processes (int);
+                    chunk   = number of initial conditions per chunk (int);
+                    xLim    = range of the initial x conditions (tuple);
+                    yLim    = range of the initial y conditions (tuple);
+                    seed    = seed of the initial conditions (int);
+
+        Returns:    hist    = number of orbits escaping after n iterations,
+                              for n = 0 ... nMax (numpy array);
+                    nLeft   = number of orbits that did not escape (int).
+    """
+
+    sizes = [min(chunk, nPoints - i) for i in range(0, nPoints, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(s, n, a, b, nMax, xLim, yLim) for s, n in zip(seeds, sizes)]
+
+    if nProc > 1:
+        with Pool(nProc) as pool: parts = pool.starmap(escape_chunk, tasks)
+    else:
+        parts = [escape_chunk(*task) for task in tasks]
+
+    hist = np.sum([part[0] for part in parts], axis=0)
+    nLeft = sum(part[1] for part in parts)
+
+    return hist, nLeft
+
+
+def fit_selection(hist, nLeft, fitRange=None, minCount=100, startFrac=0.5):
+    """ Function that selects the iterations used for the escape rate.
+        Orbits that start far from the chaotic saddle escape within a few
+        iterations, so S(n) only decays exponentially after a transient; by
+        default the range starts at the first n where S(n) has fallen to
+        'startFrac' and runs to the end. Only points with at least 'minCount'
+        survivors are used.
+
+        Input:      hist      = escape time histogram (numpy array);
+                    nLeft     = number of orbits that did not escape (int);
+                    fitRange  = range of n that is used (tuple);
+                    minCount  = smallest number of survivors used (int);
+                    startFrac = S(n) where the default range starts (float);
+
+        Returns:    n         = the iterations (numpy array);
+                    S         = the survival probability (numpy array);
+                    survivors = the number of survivors (numpy array);
+                    sel       = mask of the iterations used (numpy array).
+    """
+
+    total = np.sum(hist) + nLeft
+    survivors = total - np.cumsum(hist)
+    n = np.arange(len(hist))
+    S = survivors / total
+
+    if fitRange is None:
+        below = np.flatnonzero(S <= startFrac)
+        if len(below) == 0:
+            raise Exception(f"S(n) does not fall to {startFrac}, give fitRange")
+        fitRange = (n[below[0]], n[-1])
+
+    sel = (n >= fitRange[0]) & (n <= fitRange[1]) & (survivors >= minCount)
+    if np.count_nonzero(sel) < 2:
+        raise Exception("Too few iterations, lower minCount or widen "
+                        "fitRange")
+
+    return n, S, survivors, sel
+
+
+def escape_rate(hist, nLeft, fitRange=None, minCount=100, startFrac=0.5):
+    """ Function that estimates the escape rate kappa of transient chaos,
+        where the survival probability S(n), the fraction of orbits that
+        have not escaped after n iterations, decays as exp(-kappa n). Over
+        the iterations n0 < n <= n1 of fit_selection every survivor escapes
+        with the same probability p = 1 - exp(-kappa) per iteration, so the
+        maximum likelihood estimate is p = m / T, with m the number of
+        escapes and T the total number of iterations the survivors of n0
+        spend after n0, counting orbits that are left at n1 up to n1. The
+        error is kappa / sqrt(m). Unlike a fit to S(n), whose points are
+        cumulative and so strongly correlated, this gives a fair error.
+
+        Input:      hist      = escape time histogram (numpy array);
+                    nLeft     = number of orbits that did not escape (int);
+                    fitRange  = range of n used, by default from where S(n)
+                                has fallen to 'startFrac' (tuple);
+                    minCount  = smallest number of survivors used (int);
+                    startFrac = S(n) where the default range starts (float);
+
+        Returns:    kappa     = the escape rate (float);
+                    err       = the error of the escape rate (float);
+                    n         = the iterations (numpy array);
+                    S         = the survival probability (numpy array).
+    """
+
+    n, S, survivors, sel = fit_selection(hist, nLeft, fitRange, minCount,
+                                         startFrac)
+    n0, n1 = n[sel][0], n[sel][-1]
+
+    m = survivors[n0] - survivors[n1]               # Escapes after n0
+    if m == 0: raise Exception("No orbits escape in the range used")
+    T = np.sum(hist[n0+1:n1+1] * (n[n0+1:n1+1] - n0)) + survivors[n1] * (n1-n0)
+
+    kappa = -np.log(1 - m / T)
+
+    return kappa, kappa / np.sqrt(m), n, S
+
+
+def plot_escape(a, b=0.3, nPoints=int(1e6), nMax=int(1e4), fitRange=None,
+                minCount=100, startFrac=0.5, nProc=1, saveFig=None):
+    """ Plot the survival probability with the fitted escape rate """
+
+    hist, nLeft = escape_histogram(a, b, nPoints, nMax, nProc)
+    kappa, err, n, S = escape_rate(hist, nLeft, fitRange, minCount, startFrac)
+
+    sel = fit_selection(hist, nLeft, fitRange, minCount, startFrac)[3]
+    c = np.mean(np.log(S[sel]) + kappa * n[sel])
+
+    fig = figure(figsize=(12,8))
+    frame = fig.add_subplot(1,1,1)
+
+    frame.semilogy(n, S, color="navy", lw=2, label="$S(n)$")
+    frame.semilogy(n[sel], np.exp(c - kappa * n[sel]), ls="--", lw=2,
+                   color="crimson",
+                   label=f"$\\kappa$ = {kappa:.3e} $\\pm$ {err:.1e}")
+
+    frame.set_xlabel("$n$", fontsize=20)
+    frame.set_ylabel("Survival probability", fontsize=20)
+    frame.tick_params(axis="both", labelsize=15)
+
+    frame.legend(fontsize=20)
+    frame.grid()
+
+    if saveFig: fig.savefig(str(saveFig))
+    else: show()
@@ -33,20 +33,36 @@ def det_att(lya1, lya2, acc=0.05):
         
     else: return 5                                # No attractor
     
-def array_att(max_data, min_data, size):
-    """ Determine the type of attractor for an array of Lyapunov exponents """
+def det_att_grid(lya1, lya2, acc=0.05):
+    """ Array version of 'det_att'; finds the type of attractor for arrays of 
+        Lyapunov exponents of any shape at once, using the same thresholds. 
+        Diverging orbits can be given as NaN or None and result in type 5.
+        
+        Input:      lya1  = first Lyapunov exponents (array-like);
+                    lya2  = second Lyapunov exponents (array-like);
+                    acc   = accuracy (float);
+                    
+        Returns:    types = types of attractor (numpy array).
+    """
     
-    L = range(len(max_data))
-    types = [np.zeros((size, size)) for i in L]
+    lya1 = np.asarray(lya1, dtype=float)        # None -> NaN
+    lya2 = np.asarray(lya2, dtype=float)
     
-    for frame in L:
-        s = range(len(max_data[frame]))
-        for indX in s:
-            for indY in s:
-                types[frame][indX][indY] = det_att(max_data[frame][indX][indY], 
-                                            min_data[frame][indX][indY])
+    neg = lya1 < -acc                           # Negative exponent
+    zero = (lya1 > -acc) & (lya1 < acc)         # Zero exponent
+    pos = ~neg & ~zero & (lya1 > 0)             # Positive exponent
+    
+    # Same order of conditions as in det_att, NaN ends up in the default 5
+    conds = [neg & (lya1 > lya2+acc), neg, zero, pos & (lya2 < acc), pos]
+    types = np.select(conds, [0, 1, 2, 3, 4], default=5)
+    
+    return types.astype(float)
+
+def array_att(max_data, min_data, size):
+    """ Determine the type of attractor for an array of Lyapunov exponents """
     
-    return types
+    return [det_att_grid(max_data[frame], min_data[frame]) 
+            for frame in range(len(max_data))]
 
 def take_closest(myList, myNumber):
     """
@@ -136,6 +152,36 @@ def Transformation(Xvalues, Yvalues, a, b):
             
     return new_xvals, new_yvals
 
+def inside_polygon(xv, yv, vertices):
+    """ Function that checks for many points at once whether they lie inside a 
+        polygon, using the ray casting method: a point is inside if a ray 
+        from the point crosses the edges of the polygon an odd number of 
+        times.
+        
+        Input:      xv       = x coordinates of the points (numpy array);
+                    yv       = y coordinates of the points (numpy array);
+                    vertices = the vertices of the polygon in order (list);
+        
+        Returns:    inside   = whether each point is inside (numpy array).
+    """
+    
+    xv, yv = np.asarray(xv), np.asarray(yv)
+    inside = np.zeros(np.shape(xv), dtype=bool)
+    
+    for ind in range(len(vertices)):
+        x1, y1 = vertices[ind-1]
+        x2, y2 = vertices[ind]
+        
+        # Edges crossing the horizontal line through the point
+        crosses = (y1 > yv) != (y2 > yv)
+        
+        with np.errstate(divide="ignore", invalid="ignore"):
+            xCross = x1 + (yv - y1) * (x2 - x1) / (y2 - y1)
+        
+        inside ^= crosses & (xv < xCross)
+    
+    return inside
+
 def image_func(vertices, av, bv):
     """ Function that finds the image for given vertices. The input is a list 
         containing both the x and y values of all the input vertices. So an 
@@ -0,0 +1,256 @@
+import numpy as np
+from scipy.optimize import brentq
+
+import divergence as dv
+
+
+def cycle_map(x, y, p, a, b):
+    """ Function that applies the Hénon map p times to a point and multiplies
+        the Jacobian matrices along the way.
+
+        Input:      x, y = the point (float);
+                    p    = number of iterations (int);
+                    a    = a parameter of the Hénon map (float);
+                    b    = b parameter of the Hénon map (float);
+
+        Returns:    x, y = the p-th image of the point (float);
+                    M    = the product of the Jacobian matrices (numpy array).
+    """
+
+    M = np.eye(2)
+
+    for i in range(p):
+        M = np.array([[-2*a*x, 1], [b, 0]]) @ M
+        x, y = y + 1 - a * x * x, b * x
+
+    return x, y, M
+
+
+def periodic_orbit(p, a, b, xS, yS, tol=1e-14, maxIts=50):
+    """ Function that finds a periodic orbit of period p with Newton's
+        method, solving f^p(z) - z = 0 from the starting point (xS, yS).
+        Newton's method may also converge to an orbit with a period that
+        divides p.
+
+        Input:      p      = the period (int);
+                    a      = a parameter of the Hénon map (float);
+                    b      = b parameter of the Hénon map (float);
+                    xS, yS = starting point (float);
+                    tol    = accuracy of the orbit (float);
+                    maxIts = maximum number of Newton steps (int);
+
+        Returns:    point  = a point of the orbit, None if Newton's method
+                             did not converge (tuple);
+                    M      = Jacobian matrix of the cycle (numpy array).
+    """
+
+    x, y = xS, yS
+
+    for i in range(maxIts):
+        with np.errstate(over="ignore", invalid="ignore"):
+            fx, fy, M = cycle_map(x, y, p, a, b)
+        if not np.all(np.isfinite(M)): return None, None
+
+        res = np.array([fx - x, fy - y])
+        step = np.linalg.solve(M - np.eye(2), -res)
+        x, y = x + step[0], y + step[1]
+
+        if np.hypot(*step) < tol * (1 + np.hypot(x, y)):
+            return (x, y), cycle_map(x, y, p, a, b)[2]
+
+    return None, None
+
+
+def true_period(point, p, a, b, tol=1e-8):
+    """ Smallest period of a periodic point with a period dividing p """
+
+    x, y = point
+    for q in range(1, p+1):
+        if p % q: continue
+        qx, qy, M = cycle_map(point[0], point[1], q, a, b)
+        if np.hypot(qx - x, qy - y) < tol: return q
+
+    return p
+
+
+def attractor_point(a, b, nCut=int(1e4), xS=0, yS=0):
+    """ Last point of an orbit after nCut iterations, None if it escapes """
+
+    status, steps = dv.escape_time(xS, yS, a, b, nCut, trapped=False)
+    if status == 1: return None
+
+    x, y = xS, yS
+    for i in range(nCut):
+        x, y = y + 1 - a * x * x, b * x
+
+    return x, y
+
+
+def doubling_point(p, aLow, aStep, b=0.3, tol=1e-13, maxSteps=200):
+    """ Function that locates the value of a where the stable orbit of
+        period p doubles its period. There the orbit has a multiplier -1,
+        so det(I + M) = 1 + tr(M) + det(M) changes sign, with M the Jacobian
+        matrix of the cycle. The orbit is found at aLow by iterating the map
+        and then followed with Newton's method (every evaluation starts from
+        the previous orbit), stepping a with steps that start at aStep and
+        grow by half each time (or shrink when the orbit is lost), until the
+        sign changes; the root is then pinned with Brent's method
+        (bisection safeguarded).
+
+        Input:      p        = period of the orbit (int);
+                    aLow     = a value where the orbit is stable (float);
+                    aStep    = first step in a while looking for a bracket
+                               (float);
+                    b        = b parameter of the Hénon map (float);
+                    tol      = accuracy of the a value (float);
+                    maxSteps = maximum number of steps in a (int);
+
+        Returns:    aDouble  = a value of the period doubling (float);
+                    nEvals   = number of orbit evaluations (int).
+    """
+
+    start = attractor_point(aLow, b)
+    if start is None: raise Exception(f"The orbit escapes at a = {aLow}")
+
+    last = {"point": start, "evals": 0}         # Continuation state
+
+    def flip(a):
+        """ det(I + M) for the orbit of period p at a """
+
+        point, M = periodic_orbit(p, a, b, *last["point"])
+        last["evals"] += 1
+
+        if point is None or true_period(point, p, a, b) != p:
+            raise Exception(f"Lost the orbit of period {p} at a = {a}")
+
+        last["point"] = point
+        return 1 + np.trace(M) + np.linalg.det(M)
+
+    # Stepping until the sign changes, with growing steps
+    aOld, gOld = aLow, flip(aLow)
+    oldPoint = last["point"]
+    for i in range(maxSteps):
+        aNew = aOld + aStep
+
+        try: gNew = flip(aNew)
+        except Exception:                       # Step too large
+            last["point"] = oldPoint
+            aStep /= 4
+            continue
+
+        if np.sign(gNew) != np.sign(gOld): break
+        aOld, gOld, aStep = aNew, gNew, 1.5 * aStep
+        oldPoint = last["point"]
+    else: raise Exception(f"No period doubling of period {p} found")
+
+    # Newton starts from the orbit at the upper end of the bracket
+    aDouble = brentq(flip, aOld, aNew, xtol=tol, rtol=4*np.finfo(float).eps)
+
+    return aDouble, last["evals"]
+
+
+def doubling_cascade(nDoubling=6, b=0.3, tol=1e-13):
+    """ Function that locates the first 'nDoubling' period doublings of the
+        Hénon map for a fixed b. The period 1 orbit is stable from the
+        saddle-node at a0 = -(1 - b)**2 / 4; every next search starts a
+        quarter of the expected distance past the previous doubling, with a
+        first step of a tenth of it. The expected distance is the previous
+        one divided by the Feigenbaum constant.
+
+        Input:      nDoubling = number of period doublings (int);
+                    b         = b parameter of the Hénon map (float);
+                    tol       = accuracy of the a values (float);
+
+        Returns:    aVals     = a values of the doublings (numpy array);
+                    nEvals    = number of orbit evaluations for each (array).
+    """
+
+    aPrev = -(1 - b)**2 / 4                     # Birth of the fixed point
+    gap = 1.0                                   # Expected distance
+    aVals, nEvals = [], []
+
+    for k in range(nDoubling):
+        aD, nE = doubling_point(2**k, aPrev + gap / 4, gap / 10, b, tol)
+
+        gap = (aD - aPrev) / 4.669
+        aVals.append(aD)
+        nEvals.append(nE)
+        aPrev = aD
+
+    return np.array(aVals), np.array(nEvals)
+
+
+def feigenbaum(aVals):
+    """ Function that estimates the Feigenbaum constant and the accumulation
+        point of a period doubling cascade from the located doublings. The
+        ratios delta_k = (a_k - a_k-1) / (a_k+1 - a_k) tend to the Feigenbaum
+        constant; with the last ratio the geometric series of the remaining
+        doublings gives the accumulation point.
+
+        Input:      aVals  = a values of consecutive doublings (array-like);
+
+        Returns:    deltas = the ratios delta_k (numpy array);
+                    aInf   = estimated accumulation point (float).
+    """
+
+    aVals = np.asarray(aVals, dtype=float)
+    gaps = np.diff(aVals)
+
+    deltas = gaps[:-1] / gaps[1:]
+    aInf = aVals[-1] + gaps[-1] / (deltas[-1] - 1)
+
+    return deltas, aInf
+
+
+def crisis_point(aLow, aHigh, b=0.3, nOrbits=int(1e3), nMax=int(1e5),
+                 radius=1e-2, tol=1e-6, seed=0):
+    """ Function that locates the boundary crisis, the value of a beyond
+        which orbits on the attractor escape, by bisection. At every a an
+        ensemble of orbits started in a disk around the fixed point on the
+        attractor is iterated until it provably escapes (see
+        divergence.escape_time); a is past the crisis when any orbit
+        escapes. Starting points on the attractor of a lower a are not used,
+        as the old attractor can stick out of the new basin. Just past the
+        crisis orbits stay near the old attractor for a long time, so the
+        achievable accuracy is limited by nOrbits * nMax rather than 'tol';
+        so tol defaults to 1e-6, as much smaller values add evaluations of
+        nOrbits * nMax iterations each without improving the result.
+
+        Input:      aLow    = a value below the crisis (float);
+                    aHigh   = a value past the crisis (float);
+                    b       = b parameter of the Hénon map (float);
+                    nOrbits = number of orbits in the ensemble (int);
+                    nMax    = number of iterations per orbit (int);
+                    radius  = radius of the disk of starting points (float);
+                    tol     = accuracy of the a value (float);
+                    seed    = seed for picking the orbits (int);
+
+        Returns:    aLow    = largest a where no orbit escaped (float);
+                    aHigh   = smallest a where an orbit escaped (float);
+                    nEvals  = number of ensemble evaluations (int).
+    """
+
+    rng = np.random.default_rng(seed)
+    angle = rng.uniform(0, 2*np.pi, nOrbits)
+    radius = radius * np.sqrt(rng.uniform(0, 1, nOrbits))
+
+    def escapes(a):
+        """ Whether an orbit from around the fixed point escapes at a """
+
+        xp = (-(1 - b) + np.sqrt((1 - b)**2 + 4*a)) / (2*a)
+        xS, yS = xp + radius * np.cos(angle), b * xp + radius * np.sin(angle)
+
+        status, steps = dv.escape_time(xS, yS, a, b, nMax, trapped=False)
+        return np.any(status == 1)
+
+    if escapes(aLow) or not escapes(aHigh):
+        raise Exception("The crisis is not between aLow and aHigh")
+
+    nEvals = 2
+    while aHigh - aLow > tol:
+        aMid = (aLow + aHigh) / 2
+        if escapes(aMid): aHigh = aMid
+        else: aLow = aMid
+        nEvals += 1
+
+    return aLow, aHigh, nEvals
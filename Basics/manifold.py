@@ -0,0 +1,338 @@
+import numpy as np
+from functools import partial
+from matplotlib.pyplot import figure, show
+
+import full_henon as fh
+import general as ge
+import helper as he
+
+
+def saddle_point(a=1.4, b=0.3):
+    """ Function that finds the saddle fixed point of the Hénon map that lies
+        on the attractor, together with its eigenvalues and eigenvectors. The
+        eigenvalues follow from general.solve_eig_vals; the eigenvector of
+        eigenvalue lam is (lam, b), since the second row of the Jacobian
+        matrix gives b * vx = lam * vy.
+
+        Input:      a      = a parameter of the Hénon map (float);
+                    b      = b parameter of the Hénon map (float);
+
+        Returns:    point  = the fixed point (tuple);
+                    unst   = unstable eigenvalue and unit eigenvector (tuple);
+                    stab   = stable eigenvalue and unit eigenvector (tuple).
+    """
+
+    xp = (-(1 - b) + np.sqrt((1 - b)**2 + 4 * a)) / (2 * a)
+    lams = ge.solve_eig_vals(xp, a, b)
+
+    lamU, lamS = sorted(lams, key=abs, reverse=True)
+    vecU = np.array([lamU, b]) / np.hypot(lamU, b)
+    vecS = np.array([lamS, b]) / np.hypot(lamS, b)
+
+    return (xp, b * xp), (lamU, vecU), (lamS, vecS)
+
+
+def iterate_map(xv, yv, mapping, nTimes):
+    """ Apply 'mapping' nTimes times to arrays of points """
+
+    with np.errstate(over="ignore", invalid="ignore"):
+        for i in range(nTimes):
+            xv, yv = mapping(xv, yv)
+
+    return xv, yv
+
+
+def new_curve(size=int(1e4), maxPoints=int(1e6)):
+    """ Function that creates a growable array for the points of a curve. The
+        array doubles in size when it is full; once it holds 'maxPoints'
+        points every other point is dropped and from then on only every
+        'stride'-th point is stored, so memory stays bounded however long
+        the curve gets.
+
+        Input:      size      = initial number of points (int);
+                    maxPoints = maximum number of stored points (int);
+
+        Returns:    curve     = the growable array (dictionary).
+    """
+
+    return {"x": np.empty(size), "y": np.empty(size), "n": 0, "total": 0,
+            "stride": 1, "max": maxPoints}
+
+
+def append_points(curve, xv, yv):
+    """ Append points to a growable curve (see new_curve); of all points ever
+        appended only those with an index that is a multiple of 'stride' are
+        stored.
+    """
+
+    while True:
+        take = np.flatnonzero((curve["total"] + np.arange(len(xv)))
+                              % curve["stride"] == 0)
+        if curve["n"] + len(take) <= len(curve["x"]): break
+
+        if 2 * len(curve["x"]) <= curve["max"]:         # Growing
+            for key in ("x", "y"):
+                grown = np.empty(2 * len(curve[key]))
+                grown[:curve["n"]] = curve[key][:curve["n"]]
+                curve[key] = grown
+        else:                                           # Decimating
+            kept = (curve["n"] + 1) // 2
+            for key in ("x", "y"):
+                curve[key][:kept] = curve[key][:curve["n"]:2]
+            curve["n"] = kept
+            curve["stride"] *= 2
+
+    n = curve["n"]
+    curve["x"][n:n+len(take)] = xv[take]
+    curve["y"][n:n+len(take)] = yv[take]
+    curve["n"] += len(take)
+    curve["total"] += len(xv)
+
+
+def curve_points(curve):
+    """ The stored points of a growable curve """
+    return curve["x"][:curve["n"]], curve["y"][:curve["n"]]
+
+
+def segment_parts(xv, yv, maxDist, maxAngle, minDist, maxRadius):
+    """ Function that determines in how many parts every segment between
+        consecutive points has to be split; segments longer than 'maxDist'
+        are split so that the parts are shorter than 'maxDist', and both
+        segments at a point where the curve turns more than 'maxAngle' are
+        split in two, unless they are shorter than 'minDist'. Segments that
+        leave the disk with radius 'maxRadius' or contain non finite points
+        are not split.
+    """
+
+    dx, dy = np.diff(xv), np.diff(yv)
+    dist = np.hypot(dx, dy)
+
+    with np.errstate(invalid="ignore"):
+        parts = np.ceil(dist / maxDist)
+
+        # Turning angle at the interior points
+        angle = np.abs(np.arctan2(dx[:-1]*dy[1:] - dy[:-1]*dx[1:],
+                                  dx[:-1]*dx[1:] + dy[:-1]*dy[1:]))
+        sharp = np.zeros(len(dist), dtype=bool)
+        sharp[:-1] |= angle > maxAngle
+        sharp[1:] |= angle > maxAngle
+        sharp &= dist > minDist
+        parts[sharp] = np.maximum(parts[sharp], 2)
+
+        inside = np.hypot(xv, yv) < maxRadius
+        valid = np.isfinite(dist) & inside[:-1] & inside[1:]
+
+    return np.where(valid, np.maximum(parts, 1), 1).astype(np.int64)
+
+
+def split_params(t, parts):
+    """ Split every interval [t_i, t_i+1] into parts[i] equal intervals """
+
+    start = np.repeat(t[:-1], parts)
+    step = np.repeat(np.diff(t) / parts, parts)
+    local = np.arange(np.sum(parts)) - np.repeat(np.cumsum(parts) - parts,
+                                                  parts)
+
+    return np.append(start + local * step, t[-1])
+
+
+def manifold_piece(mapping, n, point, vector, delta, mu, maxDist=1e-2,
+                   maxAngle=0.3, minDist=1e-5, maxRadius=10, nBlock=int(1e4)):
+    """ Generator that yields the n-th image of the fundamental domain of a
+        manifold block by block. The fundamental domain is the segment
+        point + s * vector with s = delta * mu**t and t in [0, 1), which the
+        linearised map sends onto the next segment [mu * delta, mu**2 * delta).
+        The images are computed directly from the parameter t, so only one
+        block of points is in memory. Points are inserted adaptively (see
+        segment_parts) by splitting the intervals of t; blocks that grow
+        beyond twice 'nBlock' points are split into blocks of 'nBlock'.
+
+        Input:      mapping   = the map, called as mapping(x, y) (function);
+                    n         = number of times the domain is mapped (int);
+                    point     = the fixed point (tuple);
+                    vector    = unit vector of the manifold (numpy array);
+                    delta     = distance of the domain to the point (float);
+                    mu        = eigenvalue of 'mapping', larger than 1 (float);
+                    maxDist   = maximum distance between points (float);
+                    maxAngle  = maximum turning angle at a point (float);
+                    minDist   = shortest segment split for its angle (float);
+                    maxRadius = points farther away are not refined (float);
+                    nBlock    = number of points per block (int);
+
+        Yields:     xv, yv    = coordinates of the points of a block, the
+                                last point of a block is left out as it is
+                                the first point of the next block.
+    """
+
+    # Parameters of the blocks that still have to be done, last one first
+    stack = [np.linspace(0, 1, 17)]
+
+    # Smallest interval of t that can be resolved
+    minStep = 64 * np.finfo(float).eps
+
+    while stack:
+        t = stack.pop()
+
+        while True:
+            s = delta * mu**t
+            xv, yv = iterate_map(point[0] + s * vector[0],
+                                 point[1] + s * vector[1], mapping, n)
+
+            parts = segment_parts(xv, yv, maxDist, maxAngle, minDist,
+                                  maxRadius)
+            parts[np.diff(t) < minStep] = 1
+
+            if np.all(parts == 1): break
+
+            t = split_params(t, parts)
+
+            if len(t) > 2 * nBlock:                 # Splitting the block
+                edges = np.append(np.arange(0, len(t)-1, nBlock), len(t)-1)
+                for k in range(len(edges)-2, -1, -1):
+                    stack.append(t[edges[k]:edges[k+1]+1])
+                t = None
+                break
+
+        if t is not None: yield xv[:-1], yv[:-1]
+
+
+def grow_manifold(mapping, point, vector, lam, length=1e3, delta=1e-6,
+                  maxDist=1e-2, maxAngle=0.3, minDist=1e-5, maxRadius=10,
+                  nBlock=int(1e4), maxPoints=int(1e6), maxImages=100):
+    """ Function that grows a one dimensional manifold of a fixed point by
+        arc length, by mapping the fundamental domain (see manifold_piece)
+        again and again until the manifold has the requested length. For a
+        negative eigenvalue the map is applied twice per step, so the branch
+        stays on one side of the fixed point. The points are stored in a
+        growable array that thins itself out when it exceeds 'maxPoints'
+        points (see new_curve); the length is measured on all points.
+
+        Input:      mapping   = the map, called as mapping(x, y) (function);
+                    point     = the fixed point (tuple);
+                    vector    = unit vector of the manifold (numpy array);
+                    lam       = eigenvalue of the manifold, |lam| > 1 (float);
+                    length    = arc length of the manifold (float);
+                    delta     = distance of the domain to the point (float);
+                    maxDist   = maximum distance between points (float);
+                    maxAngle  = maximum turning angle at a point (float);
+                    minDist   = shortest segment split for its angle (float);
+                    maxRadius = points farther away are not refined (float);
+                    nBlock    = number of points per block (int);
+                    maxPoints = maximum number of stored points (int);
+                    maxImages = maximum number of images of the domain (int);
+
+        Returns:    curve     = the points of the manifold (dictionary);
+                    arcLength = the arc length of the manifold (float).
+    """
+
+    if lam < 0:
+        mapping = partial(iterate_map, mapping=mapping, nTimes=2)
+        lam = lam * lam
+
+    curve = new_curve(min(int(1e4), maxPoints), maxPoints)
+    append_points(curve, np.array([point[0]]), np.array([point[1]]))
+
+    arcLength = delta                               # Segment to the point
+    last = (point[0] + delta * vector[0], point[1] + delta * vector[1])
+
+    for n in range(maxImages):
+        for xv, yv in manifold_piece(mapping, n, point, vector, delta, lam,
+                                     maxDist, maxAngle, minDist, maxRadius,
+                                     nBlock):
+            keep = np.isfinite(xv) & np.isfinite(yv)
+            xv, yv = xv[keep], yv[keep]
+            if len(xv) == 0: continue
+
+            steps = np.hypot(np.diff(xv, prepend=last[0]),
+                             np.diff(yv, prepend=last[1]))
+            total = arcLength + np.cumsum(steps)
+
+            if total[-1] >= length:                 # Requested length reached
+                end = np.searchsorted(total, length) + 1
+                append_points(curve, xv[:end], yv[:end])
+                return curve, total[end-1]
+
+            append_points(curve, xv, yv)
+            arcLength, last = total[-1], (xv[-1], yv[-1])
+
+    return curve, arcLength
+
+
+def unstable_manifold(a=1.4, b=0.3, length=1e3, branch=1, **kwargs):
+    """ Function that computes one branch of the unstable manifold of the
+        saddle fixed point of the Hénon map, which is the skeleton of the
+        attractor. 'branch' (1 or -1) selects the side of the fixed point.
+        Further keyword arguments are passed to grow_manifold.
+
+        Returns:    xv, yv    = points of the manifold (numpy arrays);
+                    arcLength = the arc length of the manifold (float).
+    """
+
+    point, (lam, vect), stab = saddle_point(a, b)
+    mapping = partial(he.Transformation, a=a, b=b)
+
+    curve, arcLength = grow_manifold(mapping, point, branch * vect, lam,
+                                     length, **kwargs)
+
+    return *curve_points(curve), arcLength
+
+
+def inverse_map(xv, yv, a=1.4, b=0.3):
+    """ The inverse of the Hénon map, (x, y) -> (y / b, x - 1 + a (y / b)**2) """
+
+    xp = yv / b
+    return xp, xv - 1 + a * xp * xp
+
+
+def stable_manifold(a=1.4, b=0.3, length=1e3, branch=1, **kwargs):
+    """ Function that computes one branch of the stable manifold of the
+        saddle fixed point of the Hénon map. The stable manifold is the
+        unstable manifold of the inverse map, with eigenvalue 1 / lamS, so
+        it is grown with grow_manifold as well. 'branch' (1 or -1) selects
+        the side of the fixed point. Further keyword arguments are passed to
+        grow_manifold.
+
+        Returns:    xv, yv    = points of the manifold (numpy arrays);
+                    arcLength = the arc length of the manifold (float).
+    """
+
+    point, unst, (lam, vect) = saddle_point(a, b)
+    mapping = partial(inverse_map, a=a, b=b)
+
+    curve, arcLength = grow_manifold(mapping, point, branch * vect, 1 / lam,
+                                     length, **kwargs)
+
+    return *curve_points(curve), arcLength
+
+
+def plot_manifold(a=1.4, b=0.3, length=1e3, attractor=True, saveFig=None,
+                  **kwargs):
+    """ Plot both branches of the unstable manifold, optionally on top of
+        the attractor.
+    """
+
+    fig = figure(figsize=(15,8))
+    frame = fig.add_subplot(1,1,1)
+
+    if attractor:
+        xAtt, yAtt = fh.Henon(0, 0, int(1e5), a, b)
+        frame.scatter(xAtt[100:], yAtt[100:], s=0.01, color="darkblue",
+                      marker=".", label="Attractor")
+
+    for branch, col in ((1, "crimson"), (-1, "seagreen")):
+        xv, yv, arcLength = unstable_manifold(a, b, length, branch, **kwargs)
+        frame.plot(xv, yv, lw=0.3, color=col,
+                   label=f"Branch {branch:+d}, length {arcLength:.3g}")
+
+    point = saddle_point(a, b)[0]
+    frame.scatter(*point, s=60, color="black", zorder=3)
+
+    frame.set_xlabel("$x$", fontsize=20)
+    frame.set_ylabel("$y$", fontsize=20)
+    frame.tick_params(axis="both", labelsize=15)
+
+    frame.legend(fontsize=15)
+    frame.grid()
+
+    if saveFig: fig.savefig(str(saveFig))
+    else: show()
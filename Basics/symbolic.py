@@ -0,0 +1,190 @@
+import numpy as np
+from scipy.optimize import curve_fit
+from matplotlib.pyplot import figure, show
+
+import divergence as dv
+
+
+def mix64(values):
+    """ The splitmix64 finaliser, a fast hash of 64 bit integers; a uint64
+        array is hashed in place.
+    """
+
+    z = values.astype(np.uint64, copy=False)
+    z ^= z >> np.uint64(30)
+    z *= np.uint64(0xBF58476D1CE4E5B9)
+    z ^= z >> np.uint64(27)
+    z *= np.uint64(0x94D049BB133111EB)
+    z ^= z >> np.uint64(31)
+    return z
+
+
+def new_hll(p=14):
+    """ Function that creates a HyperLogLog sketch, which estimates the
+        number of distinct values in a stream with 2**p small registers; the
+        relative error is about 1.04 / sqrt(2**p).
+    """
+    return {"p": p, "reg": np.zeros(2**p, dtype=np.uint8)}
+
+
+def hll_add(hll, values):
+    """ Add 64 bit integers to a HyperLogLog sketch (see new_hll); a uint64
+        array is overwritten by its hashes.
+    """
+
+    p = hll["p"]
+    z = mix64(values)
+
+    index = z >> np.uint64(64 - p)
+
+    # Position of the first 1 bit in the rest of the hash; the top 53 bits
+    # convert exactly to a float, whose exponent is their bit length
+    z <<= np.uint64(p)
+    z >>= np.uint64(11)
+    z |= np.uint64(1)
+    rank = 54 - np.frexp(z.astype(float))[1]
+    np.maximum.at(hll["reg"], index, rank.astype(np.uint8))
+
+
+def hll_count(hll):
+    """ Estimated number of distinct values in a HyperLogLog sketch """
+
+    m = len(hll["reg"])
+    alpha = 0.7213 / (1 + 1.079 / m)
+
+    est = alpha * m * m / np.sum(2.0**-hll["reg"].astype(float))
+    zeros = np.count_nonzero(hll["reg"] == 0)
+
+    if est <= 2.5 * m and zeros:                    # Linear counting
+        est = m * np.log(m / zeros)
+
+    return est
+
+
+def symbol_counts(a=1.4, b=0.3, lengths=range(1, 41), nIts=int(1e5),
+                  nOrbits=int(1e4), nCut=1000, chunk=64, exactMax=24, p=14,
+                  seed=0):
+    """ Function that counts the distinct words of symbols that occur along
+        the orbits of the Hénon map, for several word lengths. The symbol of
+        a point is 1 if x >= 0 and 0 otherwise. Every orbit of an ensemble
+        keeps its last 64 symbols as the bits of one uint64, so the word of
+        length L is the lowest L bits; no symbol sequence is stored. Words
+        of length up to 'exactMax' are counted exactly in a bitmap, longer
+        words with a HyperLogLog sketch. The words of 'chunk' steps are
+        collected and then added for all lengths at once.
+
+        Input:      a        = a parameter of the Hénon map (float);
+                    b        = b parameter of the Hénon map (float);
+                    lengths  = word lengths, at most 64 (array-like);
+                    nIts     = number of symbols per orbit (int);
+                    nOrbits  = number of orbits in the ensemble (int);
+                    nCut     = iterations thrown away (int);
+                    chunk    = number of steps per chunk (int);
+                    exactMax = longest word length counted exactly (int);
+                    p        = precision of the HyperLogLog sketches (int);
+                    seed     = seed of the initial conditions (int);
+
+        Returns:    lengths  = the word lengths (numpy array);
+                    counts   = number of distinct words (numpy array).
+    """
+
+    lengths = np.asarray(lengths, dtype=int)
+    if np.any(lengths > 64): raise Exception("Words are at most 64 symbols")
+
+    masks = [np.uint64((1 << int(L)) - 1) if L < 64 else
+             np.uint64(2**64 - 1) for L in lengths]
+    seen = [np.zeros(2**L, dtype=bool) if L <= exactMax else new_hll(p)
+            for L in lengths]
+
+    # Starting points spread over the attractor
+    rng = np.random.default_rng(seed)
+    x, y = rng.normal(0, 1e-3, nOrbits), np.zeros(nOrbits)
+    R = dv.escape_radius(a, b)
+    alive = np.ones(nOrbits, dtype=bool)
+
+    with np.errstate(over="ignore", invalid="ignore"):
+        for n in range(nCut):
+            x, y = y + 1 - a * x * x, b * x
+
+        words = np.zeros(nOrbits, dtype=np.uint64)
+        buffer = np.zeros((chunk, nOrbits), dtype=np.uint64)
+
+        for start in range(0, nIts, chunk):
+            steps = min(chunk, nIts - start)
+
+            for k in range(steps):
+                words = (words << np.uint64(1)) | (x >= 0).astype(np.uint64)
+                buffer[k] = words
+                x, y = y + 1 - a * x * x, b * x
+
+                alive &= np.isfinite(x) & ~((np.abs(x) > R) &
+                                            (np.abs(y) <= np.abs(b * x)))
+                x, y = np.where(alive, x, 0), np.where(alive, y, 0)
+
+            # Words of the bounded orbits, copied once for all lengths
+            live = buffer[:steps] if alive.all() else buffer[:steps, alive]
+
+            # Adding the complete words of this chunk
+            for L, mask, store in zip(lengths, masks, seen):
+                first = max(L - 1 - start, 0)       # First complete word
+                if first >= steps: continue
+
+                new = np.bitwise_and(live[first:], mask).ravel()
+                if isinstance(store, dict): hll_add(store, new)
+                else: store[new] = True
+
+    counts = np.array([hll_count(store) if isinstance(store, dict) else
+                       np.count_nonzero(store) for store in seen], dtype=float)
+
+    return lengths, counts
+
+
+def topological_entropy(lengths, counts, fitRange=None):
+    """ Function that estimates the topological entropy as the growth rate
+        of the number of distinct words, the slope of ln N(L) against L,
+        fitted over the lengths in 'fitRange'. Returns the entropy (in nats
+        per iteration) and its error.
+    """
+
+    lengths, counts = np.asarray(lengths), np.asarray(counts)
+
+    if fitRange is None: fitRange = (lengths[0], lengths[-1])
+    sel = (lengths >= fitRange[0]) & (lengths <= fitRange[1])
+
+    def lin_fit(x, c, h):
+        return c + h * x
+
+    para, cov = curve_fit(lin_fit, lengths[sel], np.log(counts[sel]))
+
+    return para[1], np.sqrt(cov[1][1])
+
+
+def plot_words(lengths, counts, fitRange=None, saveFig=None):
+    """ Plot the number of distinct words against their length, with the
+        fit that gives the topological entropy.
+    """
+
+    h, err = topological_entropy(lengths, counts, fitRange)
+    if fitRange is None: fitRange = (lengths[0], lengths[-1])
+    fitL = np.linspace(fitRange[0], fitRange[1], 2)
+
+    sel = (lengths >= fitRange[0]) & (lengths <= fitRange[1])
+    c = np.mean(np.log(counts[sel]) - h * lengths[sel])
+
+    fig = figure(figsize=(12,8))
+    frame = fig.add_subplot(1,1,1)
+
+    frame.scatter(lengths, np.log(counts), s=100, marker="X", color="navy",
+                  zorder=3)
+    frame.plot(fitL, c + h * fitL, lw=2, color="crimson",
+               label=f"$h$ = {h:.4f} $\\pm$ {err:.4f}")
+
+    frame.set_xlabel("Word length $L$", fontsize=20)
+    frame.set_ylabel("$\\ln N(L)$", fontsize=20)
+    frame.tick_params(axis="both", labelsize=15)
+
+    frame.legend(fontsize=20)
+    frame.grid(zorder=2)
+
+    if saveFig: fig.savefig(str(saveFig))
+    else: show()
@@ -0,0 +1,241 @@
+from multiprocessing import Pool
+import numpy as np
+from scipy.spatial import cKDTree
+from matplotlib.pyplot import figure, show
+
+import manifold as mf
+
+
+def curve_segments(curves, point, exclude, box):
+    """ Function that turns curves into their line segments, leaving out
+        the segments within 'exclude' of the fixed point, where the
+        manifolds meet trivially, and the segments outside the box
+        |x|, |y| <= box, where the manifolds are not refined.
+
+        Input:      curves   = list of (xv, yv) pairs (list);
+                    point    = the fixed point (tuple);
+                    exclude  = radius around the fixed point (float);
+                    box      = half width of the box (float);
+
+        Returns:    segments = rows (x0, y0, x1, y1) (numpy array).
+    """
+
+    parts = []
+    for xv, yv in curves:
+        seg = np.column_stack((xv[:-1], yv[:-1], xv[1:], yv[1:]))
+        far = np.minimum(np.hypot(seg[:,0] - point[0], seg[:,1] - point[1]),
+                         np.hypot(seg[:,2] - point[0], seg[:,3] - point[1]))
+        keep = (far > exclude) & np.all(np.abs(seg) <= box, axis=1)
+        parts.append(seg[keep])
+
+    return np.vstack(parts) if parts else np.zeros((0, 4))
+
+
+def point_segment(px, py, seg):
+    """ Distance of points to line segments with rows (x0, y0, x1, y1) """
+
+    dx, dy = seg[...,2] - seg[...,0], seg[...,3] - seg[...,1]
+    size = np.maximum(dx*dx + dy*dy, 1e-300)
+    t = np.clip(((px - seg[...,0]) * dx + (py - seg[...,1]) * dy) / size, 0, 1)
+
+    return np.hypot(seg[...,0] + t * dx - px, seg[...,1] + t * dy - py)
+
+
+def min_distance(segA, segB, k=4):
+    """ Function that calculates the minimum distance between two sets of
+        line segments. For disjoint segments the minimum is reached at an
+        end point of one of them, so the end points of each set are
+        compared with the 'k' segments of the other set with the nearest
+        midpoints, found with a KD-tree.
+    """
+
+    if len(segA) == 0 or len(segB) == 0: return np.inf
+
+    dist = np.inf
+    for one, other in ((segA, segB), (segB, segA)):
+        mid = (other[:,:2] + other[:,2:]) / 2
+        tree = cKDTree(mid)
+
+        ends = np.vstack((one[:,:2], one[-1:,2:]))
+        kk = min(k, len(other))
+        near = tree.query(ends, kk)[1].reshape(len(ends), kk)
+
+        d = point_segment(ends[:,0,None], ends[:,1,None], other[near])
+        dist = min(dist, np.min(d))
+
+    return dist
+
+
+def crossings(segA, segB):
+    """ Function that counts the crossings between two sets of line segments.
+        Candidate pairs are segments whose midpoints are closer than the sum
+        of the largest half lengths, found with KD-trees of the midpoints;
+        they cross when the end points of each lie on opposite sides of the
+        other.
+    """
+
+    if len(segA) == 0 or len(segB) == 0: return 0
+
+    midA, midB = (segA[:,:2] + segA[:,2:]) / 2, (segB[:,:2] + segB[:,2:]) / 2
+    halfA = np.max(np.hypot(*(segA[:,2:] - segA[:,:2]).T)) / 2
+    halfB = np.max(np.hypot(*(segB[:,2:] - segB[:,:2]).T)) / 2
+
+    pairs = cKDTree(midA).sparse_distance_matrix(cKDTree(midB), halfA + halfB,
+                                                 output_type="ndarray")
+    A, B = segA[pairs["i"]], segB[pairs["j"]]
+
+    def side(s, px, py):
+        """ Sign of the cross product of a segment and a point """
+        return np.sign((s[:,2] - s[:,0]) * (py - s[:,1])
+                       - (s[:,3] - s[:,1]) * (px - s[:,0]))
+
+    cross = (side(A, B[:,0], B[:,1]) * side(A, B[:,2], B[:,3]) < 0) & \
+            (side(B, A[:,0], A[:,1]) * side(B, A[:,2], A[:,3]) < 0)
+
+    return np.count_nonzero(cross)
+
+
+def manifold_gap(a, b=0.3, lengthU=20, lengthS=20, exclude=1e-2, box=3,
+                 maxDist=2e-3):
+    """ Function that compares the unstable and stable manifold of the saddle
+        fixed point (both branches of each, see manifold.py) for one
+        parameter pair. Away from the fixed point the manifolds have no
+        common points before the first homoclinic tangency and cross
+        transversally after it; at a tangency the distance goes to zero and
+        the number of crossings changes. Near the fixed point the manifolds
+        are at a distance of order 'exclude', so smaller distances are only
+        resolved away from it. The finite lengths of the branches can also
+        change the number of crossings, when a crossing moves past the end
+        of a branch or out of the box.
+
+        Input:      a       = a parameter of the Hénon map (float);
+                    b       = b parameter of the Hénon map (float);
+                    lengthU = arc length of each unstable branch (float);
+                    lengthS = arc length of each stable branch (float);
+                    exclude = radius around the fixed point (float);
+                    box     = half width of the box that is used (float);
+                    maxDist = maximum distance between points (float);
+
+        Returns:    dist    = minimum distance between the manifolds (float);
+                    nCross  = number of crossings (int).
+    """
+
+    point = mf.saddle_point(a, b)[0]
+
+    unst = [mf.unstable_manifold(a, b, lengthU, br, maxDist=maxDist)[:2]
+            for br in (1, -1)]
+    stab = [mf.stable_manifold(a, b, lengthS, br, maxDist=maxDist)[:2]
+            for br in (1, -1)]
+
+    segU = curve_segments(unst, point, exclude, box)
+    segS = curve_segments(stab, point, exclude, box)
+
+    return min_distance(segU, segS), crossings(segU, segS)
+
+
+def tangency_scan(aVals, bVals, lengthU=20, lengthS=20, exclude=1e-2, box=3,
+                  maxDist=2e-3, nProc=1):
+    """ Function that calculates the manifold distance and the number of
+        crossings (see manifold_gap) along a line in the parameter space,
+        with the parameter pairs divided over 'nProc' processes.
+
+        Input:      aVals  = a values (array-like);
+                    bVals  = b values, same shape as aVals (array-like);
+                    others = see manifold_gap;
+                    nProc  = number of processes (int);
+
+        Returns:    dist   = minimum distances (numpy array);
+                    nCross = numbers of crossings (numpy array).
+    """
+
+    aVals, bVals = np.broadcast_arrays(np.ravel(aVals), np.ravel(bVals))
+    tasks = [(a, b, lengthU, lengthS, exclude, box, maxDist)
+             for a, b in zip(aVals, bVals)]
+
+    if nProc > 1:
+        with Pool(nProc) as pool: res = pool.starmap(manifold_gap, tasks)
+    else:
+        res = [manifold_gap(*task) for task in tasks]
+
+    return np.array([r[0] for r in res]), np.array([r[1] for r in res])
+
+
+def locate_tangency(aLow, aHigh, b=0.3, tol=1e-10, **kwargs):
+    """ Function that locates a tangency between two a values where the
+        number of crossings differs, by bisection on the number of
+        crossings. Further keyword arguments are passed to manifold_gap.
+
+        Input:      aLow   = lower a value (float);
+                    aHigh  = upper a value (float);
+                    b      = b parameter of the Hénon map (float);
+                    tol    = accuracy of the a value (float);
+
+        Returns:    aTang  = a value of the tangency (float);
+                    dist   = manifold distance at aTang (float).
+    """
+
+    nLow = manifold_gap(aLow, b, **kwargs)[1]
+    if manifold_gap(aHigh, b, **kwargs)[1] == nLow:
+        raise Exception("The number of crossings is the same at both ends")
+
+    while aHigh - aLow > tol:
+        aMid = (aLow + aHigh) / 2
+        if manifold_gap(aMid, b, **kwargs)[1] == nLow: aLow = aMid
+        else: aHigh = aMid
+
+    aTang = (aLow + aHigh) / 2
+    return aTang, manifold_gap(aTang, b, **kwargs)[0]
+
+
+def tangencies(aVals, b=0.3, nProc=1, tol=1e-10, distTol=1e-8, **kwargs):
+    """ Function that finds the tangencies along a line of a values; a
+        coarse parallel scan (see tangency_scan) brackets every change in
+        the number of crossings, which is then refined with locate_tangency.
+        A change can also come from a crossing that moves past the end of a
+        finite branch (see manifold_gap); there the manifolds stay apart, so
+        only changes where the refined distance is below 'distTol' are kept.
+        'distTol' has to be above the distance left at a tangency by the
+        accuracy 'tol' of the a value.
+
+        Returns:    aTang  = a values of the tangencies (numpy array);
+                    gaps   = manifold distances at aTang (numpy array);
+                    dist   = minimum distances of the scan (numpy array);
+                    nCross = numbers of crossings of the scan (numpy array).
+    """
+
+    aVals = np.asarray(aVals, dtype=float)
+    dist, nCross = tangency_scan(aVals, b, nProc=nProc, **kwargs)
+
+    changes = np.flatnonzero(np.diff(nCross) != 0)
+    found = [locate_tangency(aVals[i], aVals[i+1], b, tol, **kwargs)
+             for i in changes]
+    found = np.array([f for f in found if f[1] < distTol]).reshape(-1, 2)
+
+    return found[:,0], found[:,1], dist, nCross
+
+
+def plot_tangency(aVals, b=0.3, nProc=1, saveFig=None, **kwargs):
+    """ Plot the manifold distance and the number of crossings along a line
+        of a values.
+    """
+
+    aVals = np.asarray(aVals, dtype=float)
+    dist, nCross = tangency_scan(aVals, b, nProc=nProc, **kwargs)
+
+    fig = figure(figsize=(15,8))
+    frame = fig.add_subplot(1,1,1)
+    frame2 = frame.twinx()
+
+    frame.semilogy(aVals, np.maximum(dist, 1e-16), color="navy", lw=2)
+    frame2.step(aVals, nCross, where="mid", color="crimson", lw=1.5)
+
+    frame.set_xlabel("$a$", fontsize=20)
+    frame.set_ylabel("Minimum distance", fontsize=20, color="navy")
+    frame2.set_ylabel("Crossings", fontsize=20, color="crimson")
+    frame.tick_params(axis="both", labelsize=15)
+    frame2.tick_params(axis="y", labelsize=15)
+
+    frame.grid()
+
+    if saveFig: fig.savefig(str(saveFig))
+    else: show()
@@ -3,25 +3,217 @@ from matplotlib.pyplot import figure, cm, show
 
 import full_henon as fh
 import helper as he
+import divergence as dv
 
 
 def basin_attr(xVals, yVals, xSize, ySize, its=100, a=1.4, b=0.3):
-    """ Function that creates the basin of attraction """
+    """ Function that creates the basin of attraction; a cell is 1 unless its
+        orbit provably escapes within 'its' iterations. All orbits are
+        iterated together and each stops as soon as it enters the escape
+        region or the trapping region (see divergence.escape_time).
+    """
     
     # Creating x and y starting values
     xRange = np.linspace(xVals[0], xVals[1], xSize)
     yRange = np.linspace(yVals[1], yVals[0], ySize)
     
-    grid = np.zeros((ySize, xSize))     # Grid
+    xGrid, yGrid = np.meshgrid(xRange, yRange)    # Grid of starting values
+    status, steps = dv.escape_time(xGrid, yGrid, a, b, its)
+    
+    return (status != 1).astype(float)
+
+
+def cycle_point(x, y, period, a, b):
+    """ Function that finds the point with the smallest x of cycles, which
+        identifies a cycle independent of where it was entered; all cycles
+        are iterated together, each over its own period.
+    """
+    
+    bestX, bestY = x.copy(), y.copy()
+    
+    for k in range(1, np.max(period, initial=1)):
+        x, y = y + 1 - a * x * x, b * x
+        better = (k < period) & (x < bestX)
+        bestX, bestY = np.where(better, x, bestX), np.where(better, y, bestY)
     
-    # Looping over all staring values
-    for xInd, x0 in enumerate(xRange):
-        for yInd, y0 in enumerate(yRange):
-            xv, yv = fh.Henon(x0, y0, its, a, b, div=True, threshold=1e2)
+    return bestX, bestY
+
+
+def basin_labels(xVals, yVals, xSize, ySize, its=1000, a=1.4, b=0.3,
+                 maxPeriod=64, tol=1e-9, nTrans=200, nFoot=int(1e4),
+                 reuse=True):
+    """ Function that labels every pixel with the attractor its orbit goes to,
+        for coexisting attractors. All pixels are iterated as one ensemble
+        and every orbit stops as soon as its fate is known:
+        - it provably escapes (see divergence.escape_radius), label -1;
+        - it lands in a cell of a known attractor, or (with 'reuse') in the
+          cell of an already labelled pixel, and gets that label;
+        - Brent's cycle detection finds that it repeats itself within 'tol'
+          with a period up to 'maxPeriod'. The cycle is identified by its
+          point with the smallest x and looked up in (or added to) the
+          registry of attractors, and its points label their cells.
+        Every 'nTrans' iterations one of the remaining orbits is taken as a
+        chaotic attractor; it is iterated 'nFoot' times and the cells it
+        visits become the footprint of that attractor. Orbits undecided
+        after 'its' iterations keep label -2. Cells are the pixels of the
+        grid, so reusing them assumes that a pixel is not split by a basin
+        boundary.
+        
+        Input:      xVals     = lower and upper x value (tuple);
+                    yVals     = lower and upper y value (tuple);
+                    xSize     = number of x pixels (int);
+                    ySize     = number of y pixels (int);
+                    its       = maximum number of iterations (int);
+                    a         = a parameter of the Hénon map (float);
+                    b         = b parameter of the Hénon map (float);
+                    maxPeriod = largest period that is detected (int);
+                    tol       = distance at which a point repeats (float);
+                    nTrans    = iterations before a chaotic attractor is
+                                registered (int);
+                    nFoot     = iterations of the footprint orbit (int);
+                    reuse     = whether labelled pixels stop orbits (boolean);
+        
+        Returns:    labels    = attractor of every pixel, shape (ySize, xSize),
+                                -1 for escaping and -2 for undecided orbits
+                                (numpy array);
+                    attrs     = the attractors, with their period (0 for
+                                chaotic attractors) and a point (list).
+    """
+    
+    xRange = np.linspace(xVals[0], xVals[1], xSize)
+    yRange = np.linspace(yVals[1], yVals[0], ySize)
+    dx, dy = xRange[1] - xRange[0], yRange[0] - yRange[1]
+    
+    xGrid, yGrid = np.meshgrid(xRange, yRange)
+    x, y = xGrid.ravel(), yGrid.ravel()
+    
+    def cell_of(x, y):
+        """ Index of the pixel cell of points, -1 outside the grid """
+        with np.errstate(invalid="ignore"):
+            col = np.rint((x - xRange[0]) / dx)
+            row = np.rint((yRange[0] - y) / dy)
+            inside = (col >= 0) & (col < xSize) & (row >= 0) & (row < ySize)
+        return np.where(inside, row * xSize + col, -1).astype(np.int64)
+    
+    labels = np.full(xSize * ySize, -2)
+    attrCells = np.full(xSize * ySize, -2)          # Footprints of attractors
+    attrs = []
+    
+    R = dv.escape_radius(a, b)
+    
+    # State of the remaining orbits and of their cycle detection
+    ind = np.arange(xSize * ySize)
+    tortX, tortY = x.copy(), y.copy()
+    power, lam = np.ones(len(x), dtype=int), np.zeros(len(x), dtype=int)
+    
+    def finish(done, lab):
+        """ Label and remove the orbits selected by 'done' """
+        nonlocal ind, x, y, tortX, tortY, power, lam
+        labels[ind[done]] = lab
+        keep = ~done
+        ind, x, y = ind[keep], x[keep], y[keep]
+        tortX, tortY, power, lam = tortX[keep], tortY[keep], power[keep], \
+                                   lam[keep]
+    
+    def register(period, px, py):
+        """ Label of a cycle in the registry, added if it is new """
+        for k, attr in enumerate(attrs):
+            if attr["period"] == period and \
+               np.hypot(attr["point"][0] - px, attr["point"][1] - py) < 1e3*tol:
+                return k
+        
+        attrs.append({"period": int(period), "point": (px, py)})
+        cx, cy = np.zeros(period), np.zeros(period)
+        for i in range(period):
+            cx[i], cy[i] = px, py
+            px, py = py + 1 - a * px * px, b * px
+        cells = cell_of(cx, cy)
+        attrCells[cells[cells >= 0]] = len(attrs) - 1
+        return len(attrs) - 1
+    
+    with np.errstate(over="ignore", invalid="ignore"):
+        for n in range(1, its+1):
+            x, y = y + 1 - a * x * x, b * x
+            lam += 1
+            
+            # Escaping orbits
+            esc = ~np.isfinite(x) | ((np.abs(x) > R) &
+                                     (np.abs(y) <= np.abs(b * x)))
+            finish(esc, -1)
+            
+            # Orbits in a cell of an attractor or of a labelled pixel
+            cell = cell_of(x, y)
+            known = np.where(cell >= 0, attrCells[cell], -2)
+            if reuse:
+                known = np.where(known == -2,
+                                 np.where(cell >= 0, labels[cell], -2), known)
+            stop = known != -2
+            finish(stop, known[stop])
+            
+            # Brent's cycle detection
+            found = (np.abs(x - tortX) <= tol) & (np.abs(y - tortY) <= tol) & \
+                    (lam <= maxPeriod)
+            if found.any():
+                px, py = cycle_point(x[found], y[found], lam[found], a, b)
+                lab = np.array([register(p, qx, qy) for p, qx, qy in
+                                zip(lam[found], px, py)])
+                finish(found, lab)
             
-            if xv != None: grid[yInd][xInd] += 1
+            reset = lam == power
+            tortX, tortY = np.where(reset, x, tortX), np.where(reset, y, tortY)
+            power, lam = np.where(reset, 2 * power, power), \
+                         np.where(reset, 0, lam)
+            
+            # Registering a chaotic attractor from one remaining orbit
+            if n % nTrans == 0 and len(ind):
+                fx, fy = x[0], y[0]
+                footX, footY = np.zeros(nFoot), np.zeros(nFoot)
+                for i in range(nFoot):
+                    fx, fy = fy + 1 - a * fx * fx, b * fx
+                    footX[i], footY[i] = fx, fy
+                
+                cells = np.unique(cell_of(footX, footY))
+                cells = cells[cells >= 0]
+                if np.all(np.isfinite(footX)) and len(cells) > maxPeriod and \
+                   np.all(attrCells[cells] == -2):
+                    attrs.append({"period": 0, "point": (fx, fy)})
+                    attrCells[cells] = len(attrs) - 1
+            
+            if len(ind) == 0: break
+    
+    return labels.reshape(ySize, xSize), attrs
+
+
+def plot_labels(xVals=(-2, 2), yVals=(-3, 5), xSize=1024, ySize=540, its=1000,
+                a=1.4, b=0.3, saveFig=None):
+    """ Plot the basins of all attractors, escaping orbits are white """
+    
+    labels, attrs = basin_labels(xVals, yVals, xSize, ySize, its, a, b)
+    
+    cmap = cm.tab10.copy()
+    cmap.set_bad("white")
+    cmap.set_under("black")
+    
+    fig = figure(figsize=(15,8))
+    frame = fig.add_subplot(1,1,1)
     
-    return grid
+    image = np.where(labels == -1, np.nan, labels).astype(float)
+    frame.imshow(image, cmap=cmap, extent=(*xVals, *yVals), aspect="auto",
+                 vmin=-0.5, vmax=9.5, interpolation="nearest")
+    
+    for k, attr in enumerate(attrs):
+        name = f"period {attr['period']}" if attr["period"] else "chaotic"
+        frame.scatter(*attr["point"], color=cmap(k % 10), edgecolor="black",
+                      s=80, label=f"Attractor {k}: {name}")
+    
+    frame.set_xlabel(r"$x_0$", fontsize=20)
+    frame.set_ylabel(r"$y_0$", fontsize=20)
+    frame.tick_params(axis="both", labelsize=15)
+    
+    frame.legend(fontsize=15)
+    
+    if saveFig != None: fig.savefig(str(saveFig))
+    else: show()
 
 
 def plot_basin(saveFig=None):
@@ -0,0 +1,336 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+import subprocess
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+
+import numpy as np
+
+# The modules of the project import each other as siblings
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for folder in ("Basics", "Lyapunov", "Dimensions"):
+    sys.path.insert(0, os.path.join(ROOT, folder))
+
+# The modules import the orbit generator as full_henon, which is the module
+# full_attractor in this repository
+import full_attractor
+sys.modules.setdefault("full_henon", full_attractor)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HISTORY = os.path.join(HERE, "history.json")
+BASELINE = os.path.join(HERE, "baseline.json")
+
+TIERS = ("small", "medium", "large")
+SEED = 0
+
+# Orbits of the Hénon map that are reused by several benchmarks
+orbits = {}
+
+
+def orbit(n):
+    """ Orbit of n points of the Hénon map on the attractor (a=1.4, b=0.3) """
+
+    if n not in orbits:
+        from full_attractor import Henon
+        xv, yv = Henon(0, 0, n + 100, 1.4, 0.3)
+        orbits[n] = np.array(xv[100:]), np.array(yv[100:])
+
+    return orbits[n]
+
+
+# Every setup function prepares the input of one benchmark outside of the
+# timing, and returns the call that is timed and the number of points it
+# processes.
+
+def setup_henon(n):
+    from full_attractor import Henon
+    return lambda: Henon(0, 0, n, 1.4, 0.3), n
+
+
+def setup_bifurc_grid(aSize):
+    import bifurcation as bf
+    acc = 1000
+
+    def call():
+        np.random.seed(SEED)                        # Random starting points
+        return bf.bifurc_grid(aSize, 400, (1, 1.4), (-1.5, 1.5), acc)
+
+    return call, aSize * 7 * acc
+
+
+def setup_basin_attr(xSize):
+    import trapping as tr
+    ySize = xSize * 135 // 256
+    return lambda: tr.basin_attr((-2, 2), (-3, 5), xSize, ySize, 25), \
+           xSize * ySize
+
+
+def setup_lyapunov(n):
+    import lyapunov as ly
+    xv, yv = orbit(n)
+    return lambda: ly.Lyapunov(n, xv, 1.4, 0.3), n
+
+
+def setup_save_grid(size):
+    import create_grid as cg
+    folder = tempfile.mkdtemp(prefix="henon_bench_")
+
+    def call():
+        fmax, fmin = os.path.join(folder, "max.txt"), os.path.join(folder,
+                                                                     "min.txt")
+        for fname in (fmax, fmin):                  # save_grid appends
+            if os.path.exists(fname): os.remove(fname)
+        return cg.save_grid(size, 1, 1.4, 0.2, 0.3, fmax, fmin)
+
+    return call, size * size * 1000
+
+
+def setup_read_data(size):
+    import create_grid as cg
+    rng = np.random.default_rng(SEED)
+    fname = os.path.join(tempfile.mkdtemp(prefix="henon_bench_"), "grid.txt")
+
+    with open(fname, "ab") as f:                    # Two tables, as save_grid
+        for i in range(2):
+            np.savetxt(f, rng.normal(0, 0.5, (size, size)), fmt="%.3e",
+                       delimiter="|", header="1 < a < 1.4, 0.2 < b < 0.3")
+
+    return lambda: cg.read_data(fname, size), 2 * size * size
+
+
+def setup_box_counting(n):
+    import box_counting as bc
+    xv, yv = orbit(n)
+    return lambda: bc.box_counting(xv, yv, 0.01), n
+
+
+def setup_weight_boxes(n):
+    import info_dim as idim
+    xv, yv = orbit(n)
+    return lambda: idim.weight_boxes(xv, yv, 2, 8), n
+
+
+def setup_inform_dim(n):
+    import info_dim as idim
+    xv, yv = orbit(n)
+    return lambda: idim.inform_dim(xv, yv, 2, 10), n
+
+
+def setup_cut_interval(n):
+    from boxes import cut_interval
+    xv, yv = orbit(n)
+    return lambda: cut_interval((-0.5, 0.5), (-0.2, 0.2), xv, yv), n
+
+
+# Benchmarks with their setup and size for every tier
+CASES = {
+    "Henon":        (setup_henon,        (int(1e5), int(1e6), int(1e7))),
+    "bifurc_grid":  (setup_bifurc_grid,  (10, 50, 250)),
+    "basin_attr":   (setup_basin_attr,   (256, 1024, 2048)),
+    "Lyapunov":     (setup_lyapunov,     (int(1e3), int(1e4), int(1e5))),
+    "save_grid":    (setup_save_grid,    (5, 15, 50)),
+    "read_data":    (setup_read_data,    (100, 300, 1000)),
+    "box_counting": (setup_box_counting, (int(1e4), int(1e5), int(1e6))),
+    "weight_boxes": (setup_weight_boxes, (int(1e5), int(1e6), int(1e7))),
+    "inform_dim":   (setup_inform_dim,   (int(1e5), int(1e6), int(1e7))),
+    "cut_interval": (setup_cut_interval, (int(1e5), int(1e6), int(1e7))),
+}
+
+
+def measure(call, repeat=3):
+    """ Function that measures a call. The wall time is the best of 'repeat'
+        runs; the peak memory is measured in one extra run with tracemalloc
+        (which numpy reports its arrays to), as tracing slows pure Python
+        code down too much to time it at the same time.
+
+        Input:      call   = the function that is measured (function);
+                    repeat = number of timed runs (int);
+
+        Returns:    wall   = best wall time in seconds (float);
+                    peak   = peak memory in bytes (int).
+    """
+
+    wall = np.inf
+    with open(os.devnull, "w") as null, redirect_stdout(null):
+        for i in range(repeat):
+            start = time.perf_counter()
+            call()
+            wall = min(wall, time.perf_counter() - start)
+
+        tracemalloc.start()
+        try:
+            call()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally: tracemalloc.stop()
+
+    return wall, peak
+
+
+def git_commit():
+    """ Current commit of the repository, None outside of git """
+
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError): return None
+
+
+def run(tier="small", names=None, repeat=3):
+    """ Function that runs the benchmarks of one tier. A benchmark whose
+        modules cannot be imported is skipped, with the reason recorded.
+
+        Input:      tier   = size tier, one of TIERS (string);
+                    names  = benchmarks to run, all if None (list);
+                    repeat = number of timed runs (int);
+
+        Returns:    record = the results with the date, commit and tier
+                             (dictionary).
+    """
+
+    results = {}
+    for name in names or CASES:
+        setup, sizes = CASES[name]
+        size = sizes[TIERS.index(tier)]
+
+        try: call, points = setup(size)
+        except ImportError as err:
+            results[name] = {"skipped": str(err)}
+            print(f"{name:14s} skipped ({err})")
+            continue
+
+        wall, peak = measure(call, repeat)
+        results[name] = {"size": size, "points": points, "wall": wall,
+                         "peak": peak, "rate": points / wall}
+
+        print(f"{name:14s} {wall:10.4f} s {peak/2**20:10.1f} MiB "
+              f"{points/wall:12.4g} points/s")
+
+    return {"date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(), "tier": tier, "repeat": repeat,
+            "results": results}
+
+
+def load(fname, default):
+    """ Load a JSON file, 'default' if it does not exist """
+
+    if not os.path.exists(fname): return default
+    with open(fname) as f: return json.load(f)
+
+
+def save(fname, data):
+    """ Write a JSON file """
+
+    with open(fname, "w") as f: json.dump(data, f, indent=2)
+
+
+def latest(history, tier):
+    """ The last run of a tier in the history, None if there is none """
+
+    runs = [record for record in history if record["tier"] == tier]
+    return runs[-1] if runs else None
+
+
+def compare(record, baseline, threshold=0.2):
+    """ Function that compares a run with the baseline of the same tier. A
+        benchmark regresses when its wall time or its peak memory is more
+        than a fraction 'threshold' above the baseline, and also when it was
+        measured in the baseline but is skipped or missing in the run.
+
+        Input:      record    = the run (dictionary);
+                    baseline  = the baseline run (dictionary);
+                    threshold = allowed relative increase (float);
+
+        Returns:    rows      = (name, wall ratio, memory ratio, status) for
+                                every benchmark of the baseline, where the
+                                status is "ok", "regression", "skipped" or
+                                "missing" and the ratios are NaN unless both
+                                runs measured the benchmark (list).
+    """
+
+    rows = []
+    for name, old in baseline["results"].items():
+        new = record["results"].get(name)
+
+        if new is None: status = "missing"
+        elif "skipped" in new: status = "skipped"
+        elif "skipped" in old: status = "ok"        # Nothing to compare with
+        else:
+            wallRatio = new["wall"] / old["wall"]
+            memRatio = new["peak"] / max(old["peak"], 1)
+            regressed = wallRatio > 1 + threshold or memRatio > 1 + threshold
+            rows.append((name, wallRatio, memRatio,
+                         "regression" if regressed else "ok"))
+            continue
+
+        rows.append((name, np.nan, np.nan, status))
+
+    return rows
+
+
+def main(argv=None):
+    """ Command line interface, see README.md """
+
+    parser = argparse.ArgumentParser(description="Benchmarks of the Hénon "
+                                     "map code")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    runP = sub.add_parser("run", help="run benchmarks and add them to the "
+                          "history")
+    baseP = sub.add_parser("baseline", help="store the last run of a tier as "
+                           "its baseline")
+    compP = sub.add_parser("compare", help="compare the last run of a tier "
+                           "with its baseline")
+
+    for p in (runP, baseP, compP):
+        p.add_argument("--tier", choices=TIERS, default="small")
+    runP.add_argument("--only", nargs="+", choices=list(CASES))
+    runP.add_argument("--repeat", type=int, default=3)
+    compP.add_argument("--threshold", type=float, default=0.2)
+
+    args = parser.parse_args(argv)
+    history = load(HISTORY, [])
+
+    if args.command == "run":
+        history.append(run(args.tier, args.only, args.repeat))
+        save(HISTORY, history)
+        return 0
+
+    record = latest(history, args.tier)
+    if record is None:
+        print(f"No {args.tier} run in the history, use 'run' first")
+        return 1
+
+    baselines = load(BASELINE, {})
+
+    if args.command == "baseline":
+        baselines[args.tier] = record
+        save(BASELINE, baselines)
+        print(f"Baseline of tier {args.tier} set to the run of "
+              f"{record['date']} ({record['commit']})")
+        return 0
+
+    if args.tier not in baselines:
+        print(f"No baseline for tier {args.tier}, use 'baseline' first")
+        return 1
+
+    rows = compare(record, baselines[args.tier], args.threshold)
+    for name, wallRatio, memRatio, status in rows:
+        if status in ("skipped", "missing"):
+            reason = record["results"].get(name, {}).get("skipped", "")
+            print(f"{name:14s} {status.upper()} {reason}")
+        else:
+            flag = "REGRESSION" if status == "regression" else ""
+            print(f"{name:14s} time x{wallRatio:6.2f} memory x{memRatio:6.2f} "
+                  f"{flag}")
+
+    return 1 if any(row[3] != "ok" for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,6 +5,10 @@ from matplotlib.pyplot import figure, show, cm, xticks, yticks
 import full_henon as fh
 import helper as he
 
+# Region in which Hénon map is defined
+XLIM = (-1.33, 1.32)
+YLIM = (-0.5, 0.42)
+
 
 def closest(array, val):
     """ Finding closest value in list """
@@ -105,3 +109,167 @@ def red_box_dim(sF, nIts, xv, yv, xv2, yv2):
     boxDim = (np.log(nS) - np.log(n2S)) / np.log(2)     # The dimension
     
     return boxDim
+
+
+def spread_bits(v):
+    """ Insert a zero bit between each of the lower 32 bits of an unsigned 
+        integer array, used to interleave x and y cell indices.
+    """
+    
+    v = v & np.uint64(0x00000000FFFFFFFF)
+    v = (v | (v << np.uint64(16))) & np.uint64(0x0000FFFF0000FFFF)
+    v = (v | (v << np.uint64(8))) & np.uint64(0x00FF00FF00FF00FF)
+    v = (v | (v << np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    v = (v | (v << np.uint64(2))) & np.uint64(0x3333333333333333)
+    v = (v | (v << np.uint64(1))) & np.uint64(0x5555555555555555)
+    
+    return v
+
+
+def cell_codes(xv, yv, depth, xLim=XLIM, yLim=YLIM):
+    """ Function that quantises points to integer cells of a 2**depth by 
+        2**depth grid over the region and combines the x and y index into 
+        one integer by interleaving their bits (Morton order). Because of the 
+        interleaving, the cell containing a point at a coarser level is found 
+        by removing the last two bits of the code for every level. Points 
+        outside the region are left out.
+        
+        Input:      xv    = x coordinates of the points (array-like);
+                    yv    = y coordinates of the points (array-like);
+                    depth = number of levels, at most 32 (int);
+                    xLim  = lower and upper x limit of the region (tuple);
+                    yLim  = lower and upper y limit of the region (tuple);
+                    
+        Returns:    codes = cell codes of the points (numpy array).
+    """
+    
+    n = 2**depth                                    # Cells along each axis
+    
+    xInd = np.floor((np.asarray(xv) - xLim[0]) * (n / (xLim[1] - xLim[0])))
+    yInd = np.floor((np.asarray(yv) - yLim[0]) * (n / (yLim[1] - yLim[0])))
+    
+    inside = (xInd >= 0) & (xInd < n) & (yInd >= 0) & (yInd < n)
+    xInd = xInd[inside].astype(np.uint64)
+    yInd = yInd[inside].astype(np.uint64)
+    
+    return spread_bits(xInd) | (spread_bits(yInd) << np.uint64(1))
+
+
+def occupied_cells(xv, yv, depth, xLim=XLIM, yLim=YLIM, chunk=int(1e6),
+                   merge=16):
+    """ Sorted codes of all occupied cells at the finest level, the points 
+        are processed in chunks so only the occupied cells are stored. The 
+        unique codes of the chunks are collected and merged once at the end, 
+        or every 'merge' chunks to bound the memory.
+    """
+    
+    parts = [np.empty(0, dtype=np.uint64)]
+    
+    for start in range(0, len(xv), chunk):
+        codes = cell_codes(xv[start:start+chunk], yv[start:start+chunk], 
+                           depth, xLim, yLim)
+        parts.append(np.unique(codes))
+        
+        if len(parts) > merge: parts = [np.unique(np.concatenate(parts))]
+    
+    return np.unique(np.concatenate(parts))         # Sorted and unique
+
+
+def level_counts(codes, depth):
+    """ Function that counts the occupied cells at every level from sorted 
+        and unique cell codes at the finest level. Shifting the codes by two 
+        bits gives the codes one level coarser; these are still sorted, so 
+        the number of different cells follows from the number of changes.
+        
+        Input:      codes  = sorted unique codes at level 'depth' (numpy array);
+                    depth  = the finest level (int);
+                    
+        Returns:    counts = N(s) for level 0 up to 'depth' (numpy array).
+    """
+    
+    counts = np.zeros(depth+1, dtype=np.int64)
+    
+    for level in range(depth, -1, -1):
+        counts[level] = len(codes)
+        
+        codes = codes >> np.uint64(2)               # One level coarser
+        if len(codes): codes = codes[np.r_[True, codes[1:] != codes[:-1]]]
+    
+    return counts
+
+
+def dyadic_counts(xv, yv, depth=16, xLim=XLIM, yLim=YLIM, chunk=int(1e6)):
+    """ Function that finds the number of occupied boxes N(s) for all box 
+        sizes s = L / 2**k, k = 0, ..., depth, with a single pass over the 
+        points. No dense grid is created, so deep levels are possible.
+        
+        Input:      xv     = x coordinates of the points (array-like);
+                    yv     = y coordinates of the points (array-like);
+                    depth  = the finest level (int);
+                    xLim   = lower and upper x limit of the region (tuple);
+                    yLim   = lower and upper y limit of the region (tuple);
+                    chunk  = number of points processed at once (int);
+                    
+        Returns:    counts = N(s) for level 0 up to 'depth' (numpy array).
+    """
+    
+    xv, yv = np.asarray(xv), np.asarray(yv)
+    codes = occupied_cells(xv, yv, depth, xLim, yLim, chunk)
+    
+    return level_counts(codes, depth)
+
+
+def dyadic_box_dim(xv, yv, depth=16, fitRange=(4, 12), saveFig=None, 
+                   plot=False):
+    """ Function that calculates the box-counting dimension from the dyadic 
+        box counts; the slope of log2(N(s)) against the level k = log2(L/s) 
+        is fitted over the levels in 'fitRange'. Levels that are too fine 
+        for the number of points should be left out of the fit.
+        
+        Input:      xv       = x coordinates of the points (array-like);
+                    yv       = y coordinates of the points (array-like);
+                    depth    = the finest level (int);
+                    fitRange = first and last level used in the fit (tuple);
+                    saveFig  = if the figure has to be saved (None or string);
+                    plot     = whether or not a plot has to be made (boolean);
+                    
+        Returns:    dim      = box-counting dimension (float);
+                    err      = error of the dimension (float);
+                    counts   = N(s) for level 0 up to 'depth' (numpy array).
+    """
+    
+    counts = dyadic_counts(xv, yv, depth)
+    
+    levels = np.arange(depth+1)
+    fitLevels = levels[fitRange[0]:fitRange[1]+1]
+    logN = np.log2(counts[fitRange[0]:fitRange[1]+1])
+    
+    # Linear fit
+    def fit_linear(x, a, b):
+        return a * x + b
+    
+    para, cov = curve_fit(fit_linear, fitLevels, logN)
+    perr = np.sqrt(np.diag(cov))
+    
+    if plot or saveFig:
+        lab = f"$\\log_2 (N(s))$ = {para[0]:.3f} $* k$ + {para[1]:.2f}"
+        
+        fig = figure(figsize=(12,8))
+        frame = fig.add_subplot(1,1,1)
+        
+        frame.scatter(levels, np.log2(counts), s=175, marker="X", 
+                      color="navy", zorder=3)
+        frame.plot(fitLevels, fit_linear(fitLevels, *para), lw=2, label=lab, 
+                   color="crimson")
+        
+        frame.set_xlabel("$k = \\log_2 (L/s)$", fontsize=20)
+        frame.set_ylabel("$\\log_2 (N(s))$", fontsize=20)
+        frame.tick_params(axis='both', labelsize=15)
+        
+        frame.legend(fontsize=20)
+        frame.grid(zorder=2)
+        
+        if saveFig: fig.savefig(saveFig)
+        else: show()
+    
+    return para[0], perr[0], counts
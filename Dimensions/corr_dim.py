@@ -0,0 +1,161 @@
+from multiprocessing import Pool
+import numpy as np
+from scipy.spatial import cKDTree
+from scipy.optimize import curve_fit
+from matplotlib.pyplot import figure, show
+
+# Tree of all points, built once in every process
+tree = None
+
+
+def init_tree(points):
+    """ Build the tree of all points for the current process """
+    global tree
+    tree = cKDTree(points)
+
+
+def count_pairs(refPoints, radii):
+    """ Number of ordered pairs (reference point, any point) closer than each
+        radius, found in one traversal of both trees.
+    """
+    return tree.count_neighbors(cKDTree(refPoints), radii).astype(float)
+
+
+def theiler_pairs(points, refInd, radii, window):
+    """ Function that counts the pairs that are excluded by the Theiler window,
+        these are pairs of a reference point with one of the points at most
+        'window' iterations before or after it. Their distances are computed
+        directly as there are only len(refInd) * 2 * window of them.
+
+        Input:      points = all points with shape (N, 2) (numpy array);
+                    refInd = indices of the reference points (numpy array);
+                    radii  = sorted radii (numpy array);
+                    window = the Theiler window (int);
+
+        Returns:    close  = excluded pairs closer than each radius (numpy array);
+                    total  = total number of excluded pairs (int).
+    """
+
+    close = np.zeros(len(radii))
+    total = 0
+
+    for lag in range(1, window+1):
+        for other in (refInd - lag, refInd + lag):
+            valid = (other >= 0) & (other < len(points))
+            dist = np.linalg.norm(points[refInd[valid]] - points[other[valid]],
+                                  axis=1)
+
+            close += np.searchsorted(np.sort(dist), radii, side="right")
+            total += np.count_nonzero(valid)
+
+    return close, total
+
+
+def correlation_sum(xv, yv, radii, nRef=None, window=0, nProc=1, chunk=int(1e5),
+                    seed=0):
+    """ Function that calculates the correlation sum C(r) of Grassberger and
+        Procaccia for many radii at once; C(r) is the fraction of pairs of
+        points that are closer than r. Pairs are counted with a KD-tree, so
+        no N x N distance matrix is needed. Optionally only 'nRef' randomly
+        chosen reference points are used, and pairs of points less than
+        'window' iterations apart are left out (Theiler window). The
+        reference points are split into chunks which are divided over
+        'nProc' processes.
+
+        Input:      xv     = x coordinates of the orbit (array-like);
+                    yv     = y coordinates of the orbit (array-like);
+                    radii  = radii at which C(r) is computed (array-like);
+                    nRef   = number of reference points, all if None (int);
+                    window = the Theiler window (int);
+                    nProc  = number of processes (int);
+                    chunk  = number of reference points per task (int);
+                    seed   = seed for choosing the reference points (int);
+
+        Returns:    radii  = the sorted radii (numpy array);
+                    C      = the correlation sum (numpy array).
+    """
+
+    points = np.column_stack((xv, yv))
+    radii = np.sort(np.asarray(radii, dtype=float))
+    N = len(points)
+
+    if nRef is None or nRef >= N: refInd = np.arange(N)
+    else:
+        rng = np.random.default_rng(seed)
+        refInd = np.sort(rng.choice(N, nRef, replace=False))
+
+    tasks = [(points[refInd[i:i+chunk]], radii)
+             for i in range(0, len(refInd), chunk)]
+
+    if nProc > 1:
+        with Pool(nProc, initializer=init_tree, initargs=(points,)) as pool:
+            counts = sum(pool.starmap(count_pairs, tasks))
+    else:
+        init_tree(points)
+        counts = sum(count_pairs(*task) for task in tasks)
+
+    # Removing the pairs of a point with itself and the Theiler window
+    close, excluded = theiler_pairs(points, refInd, radii, window)
+    counts = counts - len(refInd) - close
+    total = len(refInd) * (N - 1) - excluded
+
+    return radii, counts / total
+
+
+def corr_dim(xv, yv, radii, fitRange=None, nRef=None, window=0, nProc=1,
+             saveFig=None, plot=False):
+    """ Function that calculates the correlation dimension; the slope of
+        log(C(r)) against log(r). Only radii inside 'fitRange' are used for
+        the fit.
+
+        Input:      xv       = x coordinates of the orbit (array-like);
+                    yv       = y coordinates of the orbit (array-like);
+                    radii    = radii at which C(r) is computed (array-like);
+                    fitRange = smallest and largest radius in the fit (tuple);
+                    nRef     = number of reference points, all if None (int);
+                    window   = the Theiler window (int);
+                    nProc    = number of processes (int);
+                    saveFig  = if the figure has to be saved (None or string);
+                    plot     = whether or not a plot has to be made (boolean);
+
+        Returns:    dim      = the correlation dimension (float);
+                    err      = error of the dimension (float);
+                    radii    = the sorted radii (numpy array);
+                    C        = the correlation sum (numpy array).
+    """
+
+    radii, C = correlation_sum(xv, yv, radii, nRef, window, nProc)
+
+    if fitRange is None: fitRange = (radii[0], radii[-1])
+    sel = (radii >= fitRange[0]) & (radii <= fitRange[1]) & (C > 0)
+
+    logR, logC = np.log(radii), np.log(np.where(C > 0, C, np.nan))
+
+    # Linear fit
+    def lin_fit(x, c0, d2):
+        return c0 + d2 * x
+
+    para, cov = curve_fit(lin_fit, logR[sel], logC[sel])
+    perr = np.sqrt(np.diag(cov))
+
+    if plot or saveFig:
+        lab = f"$\\log C(r)$ = {para[1]:.3f}$* \\log r$ + {para[0]:.2f}"
+
+        fig = figure(figsize=(12,8))
+        frame = fig.add_subplot(1,1,1)
+
+        frame.scatter(logR, logC, s=100, marker="X", color="navy", zorder=3)
+        frame.plot(logR[sel], lin_fit(logR[sel], *para), lw=2, label=lab,
+                   color="crimson")
+
+        frame.set_xlabel("$\\log r$", fontsize=20)
+        frame.set_ylabel("$\\log C(r)$", fontsize=20)
+        frame.tick_params(axis="both", labelsize=15)
+
+        frame.legend(fontsize=20)
+        frame.grid(zorder=2)
+
+        if saveFig: fig.savefig(str(saveFig))
+        else: show()
+
+    return para[1], perr[1], radii, C
@@ -1,5 +1,4 @@
 import numpy as np
-from math import log2
 import scipy.optimize as optimization
 from matplotlib.pyplot import figure, show, cm
 
@@ -17,18 +16,17 @@ def closest(lst, val):
 
 
 def return_plot(xS, yS, its, a, b, saveFig=None):
-    """ Plot the return plot of the Hénon map """
-    
-    dif = 1e-5
+    """ Plot the return plot of the Hénon map, x_n+1 against x_n of one orbit
+        (see recurrence.py for recurrence quantification)
+    """
     
     xv, yv = fh.Henon(xS, yS, its, a, b)            # Iterating Henon map
-    x2, y2 = fh.Henon(xS+dif, yS+dif, its, a, b)    # Different starting point
     
     # Plotting
     fig = figure(figsize=(15,6))
     frame = fig.add_subplot(1,1,1)
     
-    frame.scatter(xv, x2, color="navy", marker="o", s=0.01)
+    frame.scatter(xv[:-1], xv[1:], color="navy", marker="o", s=0.01)
     
     frame.set_xlabel("$x_n$", fontsize=20)
     frame.set_ylabel("$x_{n+1}$", fontsize=20)
@@ -142,26 +140,62 @@ def mean_fig(nSize, nRuns):
     show()
 
 
-def weight_boxes(x, y, start, power, plot=False, text=False):
+def box_indices(x, y, start, power):
+    """ Function that finds the box of every point at once. The boxes span 
+        the points with a small margin; a point belongs to box i if it lies 
+        in (edge_i, edge_i+1]. 
+        
+        Input:      x       = x coordinates of the points (numpy array);
+                    y       = y coordinates of the points (numpy array);
+                    start   = base of the number of boxes (int);
+                    power   = power of the number of boxes (int);
+                    
+        Returns:    xPos    = x index of the box of each point (numpy array);
+                    yPos    = y index of the box of each point (numpy array);
+                    xCoords = x limits of the boxes (numpy array);
+                    yCoords = y limits of the boxes (numpy array).
+    """
+    
+    nBox = start**power                 # Number of boxes
+    
+    xCoords = np.linspace(np.min(x)-.1, np.max(x)+.1, nBox+1)    # x limits
+    yCoords = np.linspace(np.min(y)-.05, np.max(y)+.05, nBox+1)  # y limits
+    
+    xPos = np.searchsorted(xCoords, x, side="left") - 1
+    yPos = np.searchsorted(yCoords, y, side="left") - 1
+    
+    xPos = np.clip(xPos, 0, nBox-1)
+    yPos = np.clip(yPos, 0, nBox-1)
+    
+    return xPos, yPos, xCoords, yCoords
+
+
+def weight_boxes(x, y, start, power, plot=False, text=False, sparse=False, 
+                 maxDense=2**26):
     """ Function to find and plot the number of points in each box compared to 
-        the total number of boxes.
+        the total number of boxes. All points are binned at once and counted 
+        with np.bincount. If 'sparse' is True only the occupied boxes are 
+        stored; their flat index (row * nBox + column) and weight are 
+        returned instead of a full grid, and they can not be plotted. A full 
+        grid of more than 'maxDense' boxes is refused, use sparse=True then.
     """
     
+    x, y = np.asarray(x), np.asarray(y)
     nBox = start**power                 # Number of boxes
-    boxes = np.zeros((nBox, nBox))      # Creating the boxes
     
-    xCoords = np.linspace(min(x)-.1, max(x)+.1, nBox+1)     # x limits of boxes
-    yCoords = np.linspace(min(y)-.05, max(y)+.05, nBox+1)   # y limits of boxes
+    if sparse and plot: raise Exception("Sparse weights can not be plotted")
+    if not sparse and nBox*nBox > maxDense:
+        raise Exception(f"{nBox}x{nBox} boxes is too large for a full grid, "
+                        "use sparse=True")
     
-    for ind, x in enumerate(x):
-        xV, xPos = closest(xCoords, x)
-        yV, yPos = closest(yCoords, y[ind])
-        
-        if x <= xV: xPos -= 1
-        if y[ind] <= yV: yPos -= 1
-        if yPos == -1: yPos = 0
-        
-        boxes[abs(nBox-1-yPos)][xPos] += 1
+    xPos, yPos, xCoords, yCoords = box_indices(x, y, start, power)
+    flat = (nBox-1-yPos).astype(np.int64) * nBox + xPos     # Row is flipped
+    
+    if sparse:
+        occupied, counts = np.unique(flat, return_counts=True)
+        return occupied, counts / len(flat)
+    
+    boxes = np.bincount(flat, minlength=nBox*nBox).reshape(nBox, nBox)
     
     # Normalizing boxes
     redBox = boxes / np.sum(boxes)
@@ -189,15 +223,9 @@ def weight_boxes(x, y, start, power, plot=False, text=False):
 def inform_dim(x, y, start, power):
     """ Calculate the information dimension of the Hénon map """
     
-    boxes = weight_boxes(x, y, start, power)    # Values of the boxes
-    
-    I = 0                                       # Bits of information
-    
-    for b in boxes:
-        for box in b:
-            if box != 0: I -= box * log2(box)   # -log(x) = log(1/x)
+    occupied, boxes = weight_boxes(x, y, start, power, sparse=True)
     
-    return I
+    return -np.sum(boxes * np.log2(boxes))      # -log(x) = log(1/x)
 
 
 def change_dim(base, pRange, xv, yv, saveFig=None):
@@ -1,9 +1,11 @@
+from multiprocessing import Pool
 import numpy as np
 from matplotlib.pyplot import figure, cm, savefig, show
 
 import full_henon as fh
 import lyapunov as ly
 import create_grid as cg
+import cache as ca
 
 
 def lya_henon_dim(lya):
@@ -18,11 +20,111 @@ def lya_henon_dim(lya):
     return dim
 
 
-def plot_dim(var, const, a=True, its=int(5e3), xS=0, yS=0, saveFig=None):
-    """ Plot the dimension when varying one of the parameters """
+def lya_dim_grid(lya1, lya2):
+    """ Array version of 'lya_henon_dim' for grids of exponents of any shape, 
+        assumes lya1 >= lya2. Diverging orbits (NaN or None) result in NaN.
+    """
+    
+    lya1 = np.asarray(lya1, dtype=float)        # None -> NaN
+    lya2 = np.asarray(lya2, dtype=float)
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dim = np.where(np.maximum(lya1, lya2) < 0, 1., 
+              np.where(lya1 + lya2 > 0, 2., 1 - lya1 / lya2))
+    
+    return dim
+
+
+def lya_dim(nIts=int(5e3), a=1.4, b=0.3, xS=0, yS=0, nCut=100):
+    """ Lyapunov dimension for a single pair of parameters """
+    
+    lyaMax, lyaMin, x, y = ly.lya_ensemble(xS, yS, nIts, a, b, nCut)
+    return float(lya_dim_grid(lyaMax, lyaMin))
+
+
+def sweep_blocks(aVals, bVals, nIts, nCut, warmCut, xS, yS):
+    """ Function that calculates the Lyapunov dimension along a number of 
+        blocks of parameter values. All blocks are processed together as one 
+        ensemble; within a block each parameter value starts from the final 
+        point of the previous value, so only 'warmCut' iterations have to be 
+        thrown away. The first value of a block, and values following a 
+        diverging orbit, start at (xS, yS) and throw away 'nCut' iterations.
+        
+        Input:      aVals   = a values with shape (blocks, length) (numpy array);
+                    bVals   = b values with shape (blocks, length) (numpy array);
+                    nIts    = number of iterations that are averaged (int);
+                    nCut    = iterations thrown away for a cold start (int);
+                    warmCut = iterations thrown away for a warm start (int);
+                    xS      = initial x condition (float);
+                    yS      = initial y condition (float);
+                    
+        Returns:    dims    = Lyapunov dimensions, same shape as aVals (numpy array).
+    """
+    
+    lyaMax, lyaMin = ly.continue_lines(aVals, bVals, nIts, nCut, warmCut, xS, 
+                                       yS)
+    
+    return lya_dim_grid(lyaMax, lyaMin)
+
+
+def dim_sweep(var, const, a=True, nIts=int(5e3), nCut=100, warmCut=10, xS=0, 
+              yS=0, nBlocks=None, nProc=1):
+    """ Function that calculates the Lyapunov dimension along a line in the 
+        parameter space. The line is split into 'nBlocks' consecutive blocks 
+        (by default about the square root of the number of values) that are 
+        iterated as one ensemble with warm starts, see 'sweep_blocks'. The 
+        blocks are divided over 'nProc' processes.
+        
+        Input:      var     = values of the varied parameter (array-like);
+                    const   = value of the other parameter (float);
+                    a       = whether a (True) or b (False) is varied (boolean);
+                    nIts    = number of iterations that are averaged (int);
+                    nCut    = iterations thrown away for a cold start (int);
+                    warmCut = iterations thrown away for a warm start (int);
+                    xS      = initial x condition (float);
+                    yS      = initial y condition (float);
+                    nBlocks = number of blocks (int);
+                    nProc   = number of processes (int);
+                    
+        Returns:    dims    = Lyapunov dimension for each value (numpy array).
+    """
     
-    if a: dims = [lya_dim(nIts=its, a=a, b=const, xS=xS, yS=yS) for a in var]
-    else: dims = [lya_dim(nIts=its, a=const, b=b, xS=xS, yS=yS) for b in var]
+    var = np.asarray(var, dtype=float)
+    n = len(var)
+    
+    if nBlocks is None: nBlocks = max(nProc, int(np.ceil(np.sqrt(n))))
+    nBlocks = min(nBlocks, n)
+    length = int(np.ceil(n / nBlocks))
+    
+    # Padding the last block with the last value
+    padded = np.concatenate((var, np.full(nBlocks*length - n, var[-1])))
+    padded = padded.reshape(nBlocks, length)
+    fixed = np.full(padded.shape, float(const))
+    
+    if a: aVals, bVals = padded, fixed
+    else: aVals, bVals = fixed, padded
+    
+    parts = np.array_split(np.arange(nBlocks), min(nProc, nBlocks))
+    tasks = [(aVals[p], bVals[p], nIts, nCut, warmCut, xS, yS) for p in parts]
+    
+    if nProc > 1:
+        with Pool(nProc) as pool: dims = pool.starmap(sweep_blocks, tasks)
+    else: dims = [sweep_blocks(*task) for task in tasks]
+    
+    return np.concatenate(dims).ravel()[:n]
+
+
+def plot_dim(var, const, a=True, its=int(5e3), xS=0, yS=0, saveFig=None, 
+             cache=False, nProc=1):
+    """ Plot the dimension when varying one of the parameters. If 'cache' is 
+        True the dimensions are stored on disk and reused.
+    """
+    
+    var = np.asarray(var, dtype=float)
+    
+    if cache: dims = ca.cached_call(dim_sweep, var, const, a, its, xS=xS, 
+                                    yS=yS, nProc=nProc)
+    else: dims = dim_sweep(var, const, a, its, xS=xS, yS=yS, nProc=nProc)
     
     # Plotting
     fig = figure(figsize=(15,8))
@@ -40,21 +142,11 @@ def plot_dim(var, const, a=True, its=int(5e3), xS=0, yS=0, saveFig=None):
     else: show()
 
 
-def  det_lya_dim(maxData, minData, size):
+def det_lya_dim(maxData, minData, size):
     """ Assumes lya1 >= lya2 """
     
-    L = range(len(maxData))
-    dimen = [np.zeros((size, size)) for i in L]
-    
-    for frame in L:
-        s = range(len(maxData[frame]))
-        for indX in s:
-            for indY in s:
-                dimen[frame][indX][indY] = lya_henon_dim(
-                                                [maxData[frame][indX][indY], 
-                                                 minData[frame][indX][indY]])
-    
-    return dimen
+    return [lya_dim_grid(maxData[frame], minData[frame]) 
+            for frame in range(len(maxData))]
 
 
 def plot_dim_grid(dimGrid, xRange, yRange, cMap=cm.inferno, fname=None):
@@ -90,23 +182,25 @@ def plot_dim_grid(dimGrid, xRange, yRange, cMap=cm.inferno, fname=None):
     else: show()
 
 
-def create_dim_grid(fmax, fmin, frame_size, ystack, aRange, bRange):
-    """ Create grid of pixels representing the Lyapunov dimension. """
-    
-    max_generated = cg.read_data(fmax, frame_size)     # Max L.E.
-    min_generated = cg.read_data(fmin, frame_size)     # Min L.E.
-    dim_gen = det_lya_dim(max_generated, min_generated, frame_size)   # Dim
+def create_dim_grid(fmax, fmin, frame_size, ystack, aRange, bRange, step=1):
+    """ Create grid of pixels representing the Lyapunov dimension. Only the 
+        part of the stored frames that is plotted is read, downsampled by 
+        'step' (see create_grid.read_window).
+    """
     
-    # Concatenate separate frame in right order and shape
-    all_colls = [np.concatenate
-                (dim_gen[row*ystack:(row+1)*ystack], axis = 0) 
-                for row in range(ystack)]
+    max_mosaic = cg.open_mosaic(fmax, frame_size, ystack)     # Max L.E.
+    min_mosaic = cg.open_mosaic(fmin, frame_size, ystack)     # Min L.E.
     
     xCut, yCut = 250, 200               # Part to be cutted from frame
+    rows = (xCut, max_mosaic["shape"][0])
+    cols = (yCut, max_mosaic["shape"][1])
+    
+    max_generated = cg.read_window(max_mosaic, rows, cols, step)
+    min_generated = cg.read_window(min_mosaic, rows, cols, step)
     
-    tot_generated = np.hstack(tuple(all_colls))[xCut:, yCut:]
-    aRange = aRange[yCut:]
-    bRange = bRange[xCut:]
+    tot_generated = lya_dim_grid(max_generated, min_generated)
+    aRange = aRange[yCut::step]
+    bRange = bRange[xCut::step]
     
     fName = "dimensions_grid.pdf"
     plot_dim_grid(tot_generated, bRange, aRange, fname=fName)
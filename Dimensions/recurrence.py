@@ -0,0 +1,168 @@
+from multiprocessing import Pool
+import numpy as np
+from scipy.spatial import cKDTree
+from matplotlib.pyplot import figure, show
+
+import full_henon as fh
+
+# Tree of all points, built once in every process
+tree = None
+
+
+def init_tree(points):
+    """ Build the tree of all points for the current process """
+    global tree
+    tree = cKDTree(points)
+
+
+def window_pairs(points, start, eps, theiler):
+    """ Function that finds the recurrences of the points of one window of
+        the orbit; the pairs (i, j) with j >= i + theiler and a distance
+        below eps, found by querying the tree of the window against the tree
+        of all points. Only the upper triangle of the recurrence matrix is
+        kept, as it is symmetric.
+
+        Input:      points  = the points of the window (numpy array);
+                    start   = index of the first point of the window (int);
+                    eps     = the recurrence threshold (float);
+                    theiler = smallest index difference of a pair (int);
+
+        Returns:    row     = index i of the pairs (numpy array);
+                    lag     = index difference j - i of the pairs (array).
+    """
+
+    pairs = cKDTree(points).sparse_distance_matrix(tree, eps, p=2,
+                                                   output_type="ndarray")
+
+    row = pairs["i"] + start
+    lag = pairs["j"] - row
+    keep = lag >= theiler
+
+    return row[keep].astype(np.int32), lag[keep].astype(np.int32)
+
+
+def recurrence_pairs(xv, yv, eps, theiler=1, nProc=1, window=int(1e4)):
+    """ Function that finds all recurrences of an orbit, the pairs of points
+        closer than eps, without building the N x N recurrence matrix. The
+        orbit is split into windows of 'window' points which are divided
+        over 'nProc' processes; every process holds a KD-tree of the whole
+        orbit. The pairs are stored sparsely as (row, lag) with lag = j - i,
+        sorted along the diagonals.
+
+        Input:      xv      = x coordinates of the orbit (array-like);
+                    yv      = y coordinates of the orbit (array-like);
+                    eps     = the recurrence threshold (float);
+                    theiler = smallest index difference of a pair (int);
+                    nProc   = number of processes (int);
+                    window  = number of points per window (int);
+
+        Returns:    row     = index i of the pairs (numpy array);
+                    lag     = index difference j - i >= theiler (numpy array).
+    """
+
+    points = np.column_stack((xv, yv))
+    tasks = [(points[i:i+window], i, eps, theiler)
+             for i in range(0, len(points), window)]
+
+    if nProc > 1:
+        with Pool(nProc, initializer=init_tree, initargs=(points,)) as pool:
+            parts = pool.starmap(window_pairs, tasks)
+    else:
+        init_tree(points)
+        parts = [window_pairs(*task) for task in tasks]
+
+    row = np.concatenate([part[0] for part in parts])
+    lag = np.concatenate([part[1] for part in parts])
+
+    order = np.lexsort((row, lag))
+
+    return row[order], lag[order]
+
+
+def line_lengths(key, pos):
+    """ Function that finds the lengths of the lines in sorted sparse pairs;
+        consecutive pairs belong to one line when they have the same key and
+        their positions differ by one.
+
+        Input:      key     = the line every pair can belong to (numpy array);
+                    pos     = position of the pair along the line (numpy array);
+
+        Returns:    lengths = the lengths of all lines (numpy array).
+    """
+
+    if len(key) == 0: return np.zeros(0, dtype=int)
+
+    start = np.ones(len(key), dtype=bool)
+    start[1:] = (np.diff(key) != 0) | (np.diff(pos) != 1)
+
+    return np.diff(np.append(np.flatnonzero(start), len(key)))
+
+
+def rqa(xv, yv, eps, lMin=2, vMin=2, theiler=1, nProc=1, window=int(1e4)):
+    """ Function that calculates the recurrence quantification measures of an
+        orbit from its sparse recurrences (see recurrence_pairs). The
+        recurrence rate RR is the fraction of recurrent pairs, the
+        determinism DET the fraction of recurrences on diagonal lines of at
+        least lMin points, and the laminarity LAM the fraction of recurrences
+        on vertical lines of at least vMin points. Pairs less than 'theiler'
+        iterations apart are left out. Diagonal lines follow from the pairs
+        sorted by lag, vertical lines from both halves of the symmetric
+        matrix sorted by column.
+
+        Input:      xv      = x coordinates of the orbit (array-like);
+                    yv      = y coordinates of the orbit (array-like);
+                    eps     = the recurrence threshold (float);
+                    lMin    = shortest diagonal line (int);
+                    vMin    = shortest vertical line (int);
+                    theiler = smallest index difference of a pair (int);
+                    nProc   = number of processes (int);
+                    window  = number of points per window (int);
+
+        Returns:    RR      = the recurrence rate (float);
+                    DET     = the determinism (float);
+                    LAM     = the laminarity (float).
+    """
+
+    N = len(xv)
+    row, lag = recurrence_pairs(xv, yv, eps, theiler, nProc, window)
+    if len(row) == 0: return 0, np.nan, np.nan
+
+    total = N * (N - 1) - (theiler - 1) * (2 * N - theiler)
+    RR = 2 * len(row) / total
+
+    # Diagonal lines, the pairs are already sorted by lag and row
+    diag = line_lengths(lag, row)
+    DET = np.sum(diag[diag >= lMin]) / len(row)
+
+    # Vertical lines, both halves of the matrix sorted by column and row
+    col = np.concatenate((row + lag, row))
+    rows = np.concatenate((row, row + lag))
+    order = np.lexsort((rows, col))
+
+    vert = line_lengths(col[order], rows[order])
+    LAM = np.sum(vert[vert >= vMin]) / (2 * len(row))
+
+    return RR, DET, LAM
+
+
+def plot_recurrence(xS, yS, its, a, b, eps, theiler=1, nProc=1, saveFig=None):
+    """ Plot the recurrences of an orbit of the Hénon map """
+
+    xv, yv = fh.Henon(xS, yS, its, a, b)
+    row, lag = recurrence_pairs(xv, yv, eps, theiler, nProc)
+
+    fig = figure(figsize=(10,10))
+    frame = fig.add_subplot(1,1,1)
+
+    frame.scatter(row, row + lag, color="navy", marker="s", s=0.1)
+    frame.scatter(row + lag, row, color="navy", marker="s", s=0.1)
+
+    frame.set_xlabel("$i$", fontsize=20)
+    frame.set_ylabel("$j$", fontsize=20)
+    frame.tick_params(axis="both", labelsize=15)
+
+    frame.set_xlim(0, len(xv))
+    frame.set_ylim(0, len(xv))
+
+    if saveFig: fig.savefig(str(saveFig))
+    else: show()
@@ -0,0 +1,122 @@
+import numpy as np
+from scipy.optimize import curve_fit
+from matplotlib.pyplot import figure, show
+
+import box_counting as bc
+import streaming as st
+
+
+def occupancy(xv, yv, depth=14, xLim=bc.XLIM, yLim=bc.YLIM, chunk=int(1e6)):
+    """ Multi-scale occupancy table of a set of points, the points are binned
+        once at the finest level in chunks (see streaming.new_accumulator).
+    """
+
+    acc = st.new_accumulator(depth, xLim, yLim)
+
+    for start in range(0, len(xv), chunk):
+        st.add_chunk(acc, np.asarray(xv[start:start+chunk]),
+                     np.asarray(yv[start:start+chunk]))
+
+    return acc
+
+
+def renyi_entropies(acc, qs):
+    """ Function that calculates the generalized (Rényi) entropies
+
+            H_q(s) = log2(sum_i p_i**q) / (1 - q),    H_1(s) = -sum_i p_i log2(p_i)
+
+        for every value of q and every level of the occupancy table. The sums
+        are done with the logarithms of the weights to prevent overflow for
+        negative q.
+
+        Input:      acc = the occupancy table (dictionary);
+                    qs  = values of q (array-like);
+
+        Returns:    H   = entropies with shape (len(qs), levels) (numpy array).
+    """
+
+    qs = np.asarray(qs, dtype=float)
+    H = np.zeros((len(qs), acc["depth"]+1))
+
+    for level in range(acc["depth"]+1):
+        w = st.level_weights(acc, level)
+        p = w / np.sum(w)
+        logP = np.log(p)
+
+        for qInd, q in enumerate(qs):
+            if q == 1:
+                H[qInd, level] = -np.sum(p * logP) / np.log(2)
+                continue
+
+            expo = q * logP                         # log(p**q)
+            top = np.max(expo)
+            logSum = top + np.log(np.sum(np.exp(expo - top)))
+
+            H[qInd, level] = logSum / ((1 - q) * np.log(2))
+
+    return H
+
+
+def renyi_spectrum(xv, yv, qs, depth=14, fitRange=(4, 10), acc=None):
+    """ Function that finds the generalized dimensions D_q for a vector of q
+        values from one occupancy table. Since the box size halves with every
+        level, D_q is the slope of H_q against the level; it is fitted over
+        the levels in 'fitRange'. D_0 is the box-counting dimension, D_1 the
+        information dimension and D_2 the correlation dimension.
+
+        Only q >= 0 is supported. For q < 0 the sums are dominated by the
+        sparsest boxes, whose weights are counting noise on any orbit that
+        can be stored, and box counting gives no reliable D_q there (even
+        values above 2); an Exception is raised instead.
+
+        Input:      xv       = x coordinates of the points (array-like);
+                    yv       = y coordinates of the points (array-like);
+                    qs       = values of q, at least 0 (array-like);
+                    depth    = the finest level (int);
+                    fitRange = first and last level used in the fit (tuple);
+                    acc      = existing occupancy table, if given xv and yv
+                               are not used (dictionary);
+
+        Returns:    dims     = the dimensions D_q (numpy array);
+                    errs     = errors of the dimensions (numpy array);
+                    H        = entropies for all levels (numpy array).
+    """
+
+    if np.any(np.asarray(qs) < 0):
+        raise Exception("D_q can not be estimated reliably for q < 0")
+
+    if acc is None: acc = occupancy(xv, yv, depth)
+
+    H = renyi_entropies(acc, qs)
+    levels = np.arange(fitRange[0], fitRange[1]+1)
+
+    # Linear fit
+    def lin_fit(x, h0, dq):
+        return h0 + dq * x
+
+    dims, errs = np.zeros(len(H)), np.zeros(len(H))
+
+    for qInd in range(len(H)):
+        para, cov = curve_fit(lin_fit, levels, H[qInd, levels])
+        dims[qInd], errs[qInd] = para[1], np.sqrt(cov[1][1])
+
+    return dims, errs, H
+
+
+def plot_spectrum(qs, dims, errs, saveFig=None):
+    """ Plot the generalized dimensions D_q against q """
+
+    fig = figure(figsize=(15,8))
+    frame = fig.add_subplot(1,1,1)
+
+    frame.errorbar(qs, dims, yerr=errs, color="navy", marker="X", ms=10,
+                   capsize=4, lw=1.5)
+
+    frame.set_xlabel("$q$", fontsize=20)
+    frame.set_ylabel("$D_q$", fontsize=20)
+    frame.tick_params(axis="both", labelsize=15)
+
+    frame.grid(zorder=2)
+
+    if saveFig: fig.savefig(str(saveFig))
+    else: show()
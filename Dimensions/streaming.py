@@ -0,0 +1,194 @@
+import numpy as np
+from scipy.optimize import curve_fit
+
+import full_henon as fh
+import box_counting as bc
+
+
+def new_accumulator(depth=16, xLim=bc.XLIM, yLim=bc.YLIM, merge=16):
+    """ Function that creates an empty accumulator for box counts. The
+        accumulator stores the occupied cells at the finest level (as cell
+        codes, see box_counting.cell_codes) together with the number of
+        points in each cell; from these the box counts and the information
+        at every coarser level follow. Chunks of an orbit can be added one
+        after the other, and the results can be stored at any point. The
+        cells of new chunks are kept apart and only merged with the others
+        when the results are needed (see merge_cells), or every 'merge'
+        chunks to bound the memory.
+
+        Input:      depth = the finest level (int);
+                    xLim  = lower and upper x limit of the region (tuple);
+                    yLim  = lower and upper y limit of the region (tuple);
+                    merge = number of chunks kept apart at most (int);
+
+        Returns:    acc   = the accumulator (dictionary).
+    """
+
+    acc = {"depth": depth, "xLim": xLim, "yLim": yLim,
+           "codes": np.empty(0, dtype=np.uint64),   # Occupied cells
+           "weights": np.empty(0, dtype=np.int64),  # Points in each cell
+           "pending": [],                           # Cells of new chunks
+           "merge": merge,
+           "n": 0,                                  # Number of points added
+           "last": None,                            # Last point of the orbit
+           "history": {}}                           # Results at checkpoints
+
+    return acc
+
+
+def add_chunk(acc, xv, yv):
+    """ Add a chunk of points to the accumulator """
+
+    codes = bc.cell_codes(xv, yv, acc["depth"], acc["xLim"], acc["yLim"])
+    acc["pending"].append(np.unique(codes, return_counts=True))
+    acc["n"] += len(xv)
+
+    if len(acc["pending"]) >= acc["merge"]: merge_cells(acc)
+
+
+def merge_cells(acc):
+    """ Merge the cells of the new chunks with the cells found so far """
+
+    if not acc["pending"]: return
+
+    allCodes = np.concatenate([acc["codes"]] + [p[0] for p in acc["pending"]])
+    allWeights = np.concatenate([acc["weights"]] +
+                                [p[1] for p in acc["pending"]])
+
+    acc["codes"], inv = np.unique(allCodes, return_inverse=True)
+    acc["weights"] = np.bincount(inv, weights=allWeights,
+                                 minlength=len(acc["codes"])).astype(np.int64)
+    acc["pending"] = []
+
+
+def level_weights(acc, level):
+    """ Number of points in each occupied cell at a given level """
+
+    merge_cells(acc)
+    shift = np.uint64(2 * (acc["depth"] - level))
+    codes = acc["codes"] >> shift                   # Still sorted
+
+    if not len(codes): return acc["weights"]
+
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    return np.add.reduceat(acc["weights"], starts)
+
+
+def box_counts(acc):
+    """ N(s) for level 0 up to the finest level """
+
+    merge_cells(acc)
+    return bc.level_counts(acc["codes"], acc["depth"])
+
+
+def information(acc):
+    """ Information (bits) for level 0 up to the finest level """
+
+    info = np.zeros(acc["depth"]+1)
+
+    for level in range(acc["depth"]+1):
+        p = level_weights(acc, level)
+        p = p / np.sum(p)
+        info[level] = -np.sum(p * np.log2(p))
+
+    return info
+
+
+def checkpoint(acc):
+    """ Store the box counts and information for the current number of points """
+
+    acc["history"][acc["n"]] = {"counts": box_counts(acc),
+                                "info": information(acc)}
+
+
+def extend_orbit(acc, a, b, nIts, xS=0, yS=0, nCut=100, chunk=int(1e5),
+                 checkpoints=()):
+    """ Function that extends the orbit of the Hénon map by 'nIts' points and
+        adds them to the accumulator in chunks. The orbit continues from the
+        last point of the previous call; the first call starts at (xS, yS)
+        and throws away 'nCut' points. After the number of points in the
+        accumulator reaches one of the values in 'checkpoints' the results
+        are stored in acc["history"]. So N(s, n) and N(s, 2n) are found in
+        one run by using checkpoints=(n, 2*n).
+
+        Input:      acc         = the accumulator (dictionary);
+                    a           = a parameter of the Hénon map (float);
+                    b           = b parameter of the Hénon map (float);
+                    nIts        = number of points that will be added (int);
+                    xS          = initial x condition (float);
+                    yS          = initial y condition (float);
+                    nCut        = points that will be thrown away (int);
+                    chunk       = number of points generated at once (int);
+                    checkpoints = total numbers of points at which the
+                                  results are stored (tuple);
+    """
+
+    if acc["last"] is None:                         # Throwing away transient
+        xv, yv = fh.Henon(xS, yS, nCut, a, b)
+        acc["last"] = (xv[-1], yv[-1])
+
+    x, y = acc["last"]
+    target = acc["n"] + nIts
+    stops = sorted(c for c in checkpoints if acc["n"] < c <= target)
+
+    while acc["n"] < target:
+        nextStop = stops[0] if stops else target
+        size = min(chunk, nextStop - acc["n"])
+
+        xv, yv = fh.Henon(x, y, size, a, b)         # Includes starting point
+        add_chunk(acc, np.asarray(xv[1:]), np.asarray(yv[1:]))
+        x, y = xv[-1], yv[-1]
+
+        if stops and acc["n"] == stops[0]:
+            checkpoint(acc)
+            stops.pop(0)
+
+    acc["last"] = (x, y)
+
+
+def red_box_dim(acc, nIts, level, alpha=2.42, beta=0.89):
+    """ Function that calculates the reduced box-counting dimension (see
+        box_counting.red_box_dim) from the checkpoints at n = nIts and
+        n = 2*nIts. The box size 2s is one level coarser than s.
+
+        Input:      acc    = the accumulator with both checkpoints (dictionary);
+                    nIts   = number of points n (int);
+                    level  = level of the box size s (int);
+                    alpha  = constant from Grassberger (float);
+                    beta   = constant from Grassberger (float);
+
+        Returns:    boxDim = the reduced box-counting dimension (float).
+    """
+
+    gridN = acc["history"][nIts]["counts"][level]       # N(s, n)
+    grid2N = acc["history"][2*nIts]["counts"][level]    # N(s, 2n)
+    grid2S = acc["history"][nIts]["counts"][level-1]    # N(2s, n)
+
+    sF = 2.**(-level)                                   # Relative box size
+    mult1 = (sF**(-alpha)) * (nIts**(-beta))            # Recurring factor
+    mult2 = ((2*sF)**(-alpha)) * (nIts**(-beta))
+
+    denom = (1 - 2**(-beta)) * mult1                    # Denominator
+    gamma1 = (grid2N - gridN) / denom                   # Constant gamma_1
+
+    nS = gridN + gamma1 * mult1                         # Finding N(s)
+    n2S = grid2S + gamma1 * mult2                       # Finding N(2s)
+
+    return (np.log(nS) - np.log(n2S)) / np.log(2)
+
+
+def info_dim(acc, fitRange=(4, 12)):
+    """ Information dimension from the accumulator; slope of the information
+        against the level over the levels in 'fitRange'. Returns the
+        dimension and its error.
+    """
+
+    info = information(acc)
+    levels = np.arange(fitRange[0], fitRange[1]+1)
+
+    def lin_fit(x, i0, di):
+        return i0 + di * x
+
+    para, cov = curve_fit(lin_fit, levels, info[levels])
+
+    return para[1], np.sqrt(cov[1][1])
@@ -0,0 +1,243 @@
+import numpy as np
+from scipy.optimize import curve_fit
+from matplotlib.pyplot import figure, show, cm
+
+import helper as he
+import trapping as tr
+import box_counting as bc
+
+
+def grid_shape(depth):
+    """ Number of boxes in the x and y direction at a given depth; the boxes
+        are bisected in x and y in turn, starting with x.
+    """
+    return 2**((depth+1) // 2), 2**(depth // 2)
+
+
+def box_limits(codes, depth, xLim=bc.XLIM, yLim=bc.YLIM):
+    """ Lower left corner and size of boxes given by their code iy * nx + ix """
+
+    nX, nY = grid_shape(depth)
+    dx = (xLim[1] - xLim[0]) / nX
+    dy = (yLim[1] - yLim[0]) / nY
+
+    iy, ix = np.divmod(codes, nX)
+
+    return xLim[0] + ix * dx, yLim[0] + iy * dy, dx, dy
+
+
+def initial_cover(depth, vertices=None, nTest=5, xLim=bc.XLIM, yLim=bc.YLIM):
+    """ Function that finds the boxes at a given depth that intersect the
+        trapping region. A box is kept if one of nTest x nTest test points
+        on the box (including its corners) lies inside the trapping region,
+        or if a vertex of the trapping region lies inside the box.
+
+        Input:      depth    = depth of the boxes (int);
+                    vertices = vertices of the trapping region (list);
+                    nTest    = number of test points along each axis (int);
+                    xLim     = lower and upper x limit of the domain (tuple);
+                    yLim     = lower and upper y limit of the domain (tuple);
+
+        Returns:    codes    = sorted codes of the kept boxes (numpy array).
+    """
+
+    if vertices is None: vertices = tr.trapp_region(output=True)[0]
+
+    nX, nY = grid_shape(depth)
+    codes = np.arange(nX * nY, dtype=np.int64)
+    x0, y0, dx, dy = box_limits(codes, depth, xLim, yLim)
+
+    keep = np.zeros(len(codes), dtype=bool)
+    for ox in np.linspace(0, 1, nTest):
+        for oy in np.linspace(0, 1, nTest):
+            keep |= he.inside_polygon(x0 + ox*dx, y0 + oy*dy, vertices)
+
+    for vx, vy in vertices:
+        keep |= (x0 <= vx) & (vx <= x0+dx) & (y0 <= vy) & (vy <= y0+dy)
+
+    return codes[keep]
+
+
+def subdivide(codes, depth):
+    """ Bisect every box, returns the codes of the children at depth+1 """
+
+    nX, nY = grid_shape(depth)
+    iy, ix = np.divmod(codes, nX)
+
+    if depth % 2 == 0:                              # Bisecting in x
+        ix = np.stack((2*ix, 2*ix+1), axis=1)
+        iy = np.stack((iy, iy), axis=1)
+    else:                                           # Bisecting in y
+        ix = np.stack((ix, ix), axis=1)
+        iy = np.stack((2*iy, 2*iy+1), axis=1)
+
+    return np.sort((iy * grid_shape(depth+1)[0] + ix).ravel())
+
+
+def image_rectangles(x0, y0, dx, dy, a, b, eps=1e-12):
+    """ Function that encloses the image of boxes under the Hénon map in
+        rectangles. Because x' = 1 + y - a x**2 only depends on x through
+        x**2 and y' = b x, the smallest enclosing rectangle of the image of
+        [x0, x0+dx] x [y0, y0+dy] follows exactly from the range of x**2 on
+        the box. The rectangles are widened by 'eps' against round-off.
+
+        Input:      x0, y0 = lower left corners of the boxes (numpy array);
+                    dx, dy = size of the boxes (float);
+                    a      = a parameter of the Hénon map (float);
+                    b      = b parameter of the Hénon map (float);
+                    eps    = extra margin of the rectangles (float);
+
+        Returns:    xLow, xHigh, yLow, yHigh = limits of the rectangles.
+    """
+
+    x1 = x0 + dx
+    sqHigh = np.maximum(x0*x0, x1*x1)               # Range of x**2
+    sqLow = np.where((x0 <= 0) & (x1 >= 0), 0, np.minimum(x0*x0, x1*x1))
+
+    aLow, aHigh = (a*sqLow, a*sqHigh) if a >= 0 else (a*sqHigh, a*sqLow)
+
+    xLow = 1 + y0 - aHigh - eps
+    xHigh = 1 + y0 + dy - aLow + eps
+    yLow = np.minimum(b*x0, b*x1) - eps
+    yHigh = np.maximum(b*x0, b*x1) + eps
+
+    return xLow, xHigh, yLow, yHigh
+
+
+def hit_boxes(codes, depth, a, b, nSub=2, batch=int(1e5), xLim=bc.XLIM,
+              yLim=bc.YLIM):
+    """ Function that finds all boxes at a given depth that intersect the
+        enclosures of the images of the given boxes. Each box is split into
+        nSub x nSub parts whose images are enclosed separately, which gives
+        tighter enclosures. All boxes covered by a rectangle are listed with
+        np.repeat, in batches of 'batch' boxes.
+
+        Input:      codes = codes of the boxes that are mapped (numpy array);
+                    depth = depth of the boxes (int);
+                    a     = a parameter of the Hénon map (float);
+                    b     = b parameter of the Hénon map (float);
+                    nSub  = number of parts along each axis (int);
+                    batch = number of boxes processed at once (int);
+                    xLim  = lower and upper x limit of the domain (tuple);
+                    yLim  = lower and upper y limit of the domain (tuple);
+
+        Returns:    hits  = sorted codes of the boxes that are hit (numpy array).
+    """
+
+    nX, nY = grid_shape(depth)
+    hits = np.empty(0, dtype=np.int64)
+
+    for start in range(0, len(codes), batch):
+        x0, y0, dx, dy = box_limits(codes[start:start+batch], depth, xLim,
+                                    yLim)
+
+        # Splitting the boxes into parts
+        offs = np.arange(nSub) / nSub
+        offX, offY = [o.ravel() for o in np.meshgrid(offs, offs)]
+        x0 = (x0[:,None] + offX[None,:] * dx).ravel()
+        y0 = (y0[:,None] + offY[None,:] * dy).ravel()
+
+        xLow, xHigh, yLow, yHigh = image_rectangles(x0, y0, dx/nSub, dy/nSub,
+                                                    a, b)
+
+        # Index ranges of the boxes covered by the rectangles
+        ixLow = np.floor((xLow - xLim[0]) / dx).astype(np.int64)
+        ixHigh = np.floor((xHigh - xLim[0]) / dx).astype(np.int64)
+        iyLow = np.floor((yLow - yLim[0]) / dy).astype(np.int64)
+        iyHigh = np.floor((yHigh - yLim[0]) / dy).astype(np.int64)
+
+        ixLow, ixHigh = np.maximum(ixLow, 0), np.minimum(ixHigh, nX-1)
+        iyLow, iyHigh = np.maximum(iyLow, 0), np.minimum(iyHigh, nY-1)
+
+        cx = np.maximum(ixHigh - ixLow + 1, 0)
+        cy = np.maximum(iyHigh - iyLow + 1, 0)
+        n = cx * cy                                 # Boxes per rectangle
+
+        # Listing all covered boxes
+        rect = np.repeat(np.arange(len(n)), n)
+        local = np.arange(np.sum(n)) - np.repeat(np.cumsum(n) - n, n)
+        oy, ox = np.divmod(local, cx[rect])
+
+        found = (iyLow[rect] + oy) * nX + ixLow[rect] + ox
+        hits = np.union1d(hits, found)
+
+    return hits
+
+
+def subdivision(depth, a=1.4, b=0.3, startDepth=8, nSub=2, nSelect=1,
+                xLim=bc.XLIM, yLim=bc.YLIM):
+    """ Function that covers the attractor of the Hénon map with boxes using
+        the subdivision algorithm of Dellnitz and Hohmann (GAIO). It starts
+        with the boxes covering the trapping region; then every step all
+        boxes are bisected and only the boxes that intersect the image of
+        the collection are kept. The images are enclosed rigorously (see
+        'image_rectangles'), so the collection always contains the
+        attractor. The selection can be repeated 'nSelect' times per depth.
+
+        Input:      depth      = final depth (int);
+                    a          = a parameter of the Hénon map (float);
+                    b          = b parameter of the Hénon map (float);
+                    startDepth = depth of the initial cover (int);
+                    nSub       = number of parts along each axis (int);
+                    nSelect    = number of selection steps per depth (int);
+                    xLim       = lower and upper x limit of the domain (tuple);
+                    yLim       = lower and upper y limit of the domain (tuple);
+
+        Returns:    depths     = the depths (numpy array);
+                    counts     = number of boxes N at each depth (numpy array);
+                    codes      = codes of the boxes at the final depth
+                                 (numpy array).
+    """
+
+    codes = initial_cover(startDepth, xLim=xLim, yLim=yLim)
+    depths, counts = [startDepth], [len(codes)]
+
+    for d in range(startDepth, depth):
+        codes = subdivide(codes, d)
+
+        for step in range(nSelect):
+            hits = hit_boxes(codes, d+1, a, b, nSub, xLim=xLim, yLim=yLim)
+            codes = np.intersect1d(codes, hits, assume_unique=True)
+
+        depths.append(d+1)
+        counts.append(len(codes))
+
+    return np.asarray(depths), np.asarray(counts), codes
+
+
+def cover_dim(depths, counts, fitRange=None):
+    """ Box-counting dimension from the subdivision counts. Every two depths
+        the size of the boxes halves, so the dimension is the slope of
+        log2(N) against depth / 2. Returns the dimension and its error.
+    """
+
+    if fitRange is None: fitRange = (depths[0], depths[-1])
+    sel = (depths >= fitRange[0]) & (depths <= fitRange[1])
+
+    def lin_fit(x, c, dim):
+        return c + dim * x
+
+    para, cov = curve_fit(lin_fit, depths[sel] / 2, np.log2(counts[sel]))
+
+    return para[1], np.sqrt(cov[1][1])
+
+
+def plot_cover(codes, depth, xLim=bc.XLIM, yLim=bc.YLIM, saveFig=None):
+    """ Plot the boxes of a cover """
+
+    nX, nY = grid_shape(depth)
+    grid = np.zeros(nX * nY, dtype=bool)
+    grid[codes] = True
+
+    fig = figure(figsize=(15,8))
+    frame = fig.add_subplot(1,1,1)
+
+    frame.imshow(grid.reshape(nY, nX), cmap=cm.binary, origin="lower",
+                 extent=(*xLim, *yLim), aspect="auto", interpolation="none")
+
+    frame.set_xlabel("$x$", fontsize=20)
+    frame.set_ylabel("$y$", fontsize=20)
+    frame.tick_params(axis="both", labelsize=15)
+
+    if saveFig: fig.savefig(str(saveFig))
+    else: show()
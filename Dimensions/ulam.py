@@ -0,0 +1,203 @@
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.linalg import eigs
+from matplotlib.pyplot import figure, show, cm
+
+import helper as he
+import trapping as tr
+import divergence as dv
+import box_counting as bc
+
+
+def cover_region(a=1.4, b=0.3):
+    """ Function that finds a region that contains the attractor for the
+        given parameters. The trapping region is used when the map sends it
+        into itself (see divergence.maps_into), which only holds close to
+        a = 1.4, b = 0.3. Otherwise the square |x| <= R, |y| <= |b| R is
+        used, with R the escape radius (see divergence.escape_radius): at
+        the point of a compact invariant set with the largest |x| the
+        preimage has a smaller |x|, so |y| <= |b| |x| there, and |x| > R
+        would put the point in the escape region.
+
+        Input:      a        = a parameter of the Hénon map (float);
+                    b        = b parameter of the Hénon map (float);
+
+        Returns:    vertices = vertices of the region (list);
+                    xLim     = lower and upper x limit of the region (tuple);
+                    yLim     = lower and upper y limit of the region (tuple).
+    """
+
+    vertices = tr.trapp_region(output=True)[0]
+    if dv.maps_into(a, b, vertices):
+        xv, yv = zip(*vertices)
+        return vertices, (min(xv), max(xv)), (min(yv), max(yv))
+
+    R = float(dv.escape_radius(a, b))
+    if not np.isfinite(R): raise Exception(f"No bounded region for a = {a}")
+
+    yR = abs(b) * R
+    vertices = [(-R, -yR), (R, -yR), (R, yR), (-R, yR)]
+    return vertices, (-R, R), (-yR, yR)
+
+
+def active_boxes(nX, nY, xLim=bc.XLIM, yLim=bc.YLIM, vertices=None):
+    """ Function that selects the boxes of an nX by nY grid that intersect
+        a region, by default the trapping region; a box is kept if its centre
+        or one of its corners lies inside the region. Boxes are numbered row
+        by row, so box (ix, iy) has index iy * nX + ix.
+
+        Input:      nX       = number of boxes in the x direction (int);
+                    nY       = number of boxes in the y direction (int);
+                    xLim     = lower and upper x limit of the grid (tuple);
+                    yLim     = lower and upper y limit of the grid (tuple);
+                    vertices = vertices of the region (list);
+
+        Returns:    active   = sorted indices of the kept boxes (numpy array).
+    """
+
+    if vertices is None: vertices = tr.trapp_region(output=True)[0]
+
+    dx = (xLim[1] - xLim[0]) / nX
+    dy = (yLim[1] - yLim[0]) / nY
+
+    ix, iy = np.meshgrid(np.arange(nX), np.arange(nY))
+    keep = np.zeros((nY, nX), dtype=bool)
+
+    for ox, oy in ((0.5, 0.5), (0, 0), (1, 0), (0, 1), (1, 1)):
+        keep |= he.inside_polygon(xLim[0] + (ix + ox) * dx,
+                                  yLim[0] + (iy + oy) * dy, vertices)
+
+    return np.flatnonzero(keep)
+
+
+def transition_matrix(nX, nY, a=1.4, b=0.3, nSample=8, batch=int(1e4),
+                      xLim=None, yLim=None):
+    """ Function that builds the Ulam approximation of the transfer operator
+        of the Hénon map. In every box an nSample by nSample grid of test
+        points is mapped; entry (i, j) of the matrix is the fraction of the
+        test points of box i that land in box j. The boxes are processed in
+        batches of 'batch' boxes and the matrix is stored in sparse form.
+        The boxes are those that intersect the region of cover_region for
+        the given parameters, by default on a grid over the box around it.
+        Test points that leave the kept boxes are lost.
+
+        Input:      nX      = number of boxes in the x direction (int);
+                    nY      = number of boxes in the y direction (int);
+                    a       = a parameter of the Hénon map (float);
+                    b       = b parameter of the Hénon map (float);
+                    nSample = number of test points along each axis (int);
+                    batch   = number of boxes processed at once (int);
+                    xLim    = lower and upper x limit of the grid (tuple);
+                    yLim    = lower and upper y limit of the grid (tuple);
+
+        Returns:    P       = the transition matrix (scipy sparse matrix);
+                    active  = indices of the boxes of the matrix (numpy array).
+    """
+
+    vertices, xCover, yCover = cover_region(a, b)
+    if xLim is None: xLim = xCover
+    if yLim is None: yLim = yCover
+
+    active = active_boxes(nX, nY, xLim, yLim, vertices)
+    nActive = len(active)
+
+    lookup = np.full(nX * nY, -1)                   # Box -> row of matrix
+    lookup[active] = np.arange(nActive)
+
+    dx = (xLim[1] - xLim[0]) / nX
+    dy = (yLim[1] - yLim[0]) / nY
+
+    # Positions of the test points inside a box, relative to its corner
+    offs = (np.arange(nSample) + 0.5) / nSample
+    offX, offY = [o.ravel() for o in np.meshgrid(offs, offs)]
+
+    rows, cols = [], []
+
+    for start in range(0, nActive, batch):
+        source = np.arange(start, min(start+batch, nActive))
+        iy, ix = np.divmod(active[source], nX)
+
+        xs = xLim[0] + (ix[:,None] + offX[None,:]) * dx
+        ys = yLim[0] + (iy[:,None] + offY[None,:]) * dy
+        xn, yn = he.Transformation(xs, ys, a, b)    # Images of test points
+
+        tx = np.floor((xn - xLim[0]) / dx).astype(np.int64)
+        ty = np.floor((yn - yLim[0]) / dy).astype(np.int64)
+        valid = (tx >= 0) & (tx < nX) & (ty >= 0) & (ty < nY)
+
+        target = np.full(tx.shape, -1)
+        target[valid] = lookup[ty[valid] * nX + tx[valid]]
+        valid &= target >= 0
+
+        rows.append(np.broadcast_to(source[:,None], tx.shape)[valid])
+        cols.append(target[valid])
+
+    rows, cols = np.concatenate(rows), np.concatenate(cols)
+    weights = np.full(len(rows), 1 / nSample**2)
+
+    # Duplicate entries are summed
+    P = coo_matrix((weights, (rows, cols)), shape=(nActive, nActive)).tocsr()
+
+    return P, active
+
+
+def invariant_density(nX, nY, a=1.4, b=0.3, nSample=8, xLim=None,
+                      yLim=None, tol=1e-10):
+    """ Function that finds the invariant density of the Hénon map with
+        Ulam's method; the density is the left eigenvector belonging to the
+        largest eigenvalue of the transition matrix, found with a sparse
+        eigensolver. Only the boxes intersecting the region that contains
+        the attractor for the given parameters are used (see cover_region),
+        which keeps the matrix small; by default the grid covers the box
+        around that region. An eigenvalue clearly below 1 means that mass
+        leaves the boxes.
+
+        Input:      nX      = number of boxes in the x direction (int);
+                    nY      = number of boxes in the y direction (int);
+                    a       = a parameter of the Hénon map (float);
+                    b       = b parameter of the Hénon map (float);
+                    nSample = number of test points along each axis (int);
+                    xLim    = lower and upper x limit of the grid (tuple);
+                    yLim    = lower and upper y limit of the grid (tuple);
+                    tol     = tolerance of the eigensolver (float);
+
+        Returns:    density = probability of each box, shape (nY, nX), the
+                              first row is the lowest y (numpy array);
+                    eigVal  = the largest eigenvalue, close to 1 (float).
+    """
+
+    P, active = transition_matrix(nX, nY, a, b, nSample, xLim=xLim, yLim=yLim)
+
+    v0 = np.full(len(active), 1 / len(active))      # Uniform start
+    vals, vecs = eigs(P.T, k=1, which="LM", v0=v0, tol=tol)
+
+    vect = np.abs(np.real(vecs[:,0]))
+    density = np.zeros(nX * nY)
+    density[active] = vect / np.sum(vect)
+
+    return density.reshape(nY, nX), np.real(vals[0])
+
+
+def plot_density(density, xLim=None, yLim=None, saveFig=None, a=1.4, b=0.3):
+    """ Plot the invariant density on a logarithmic color scale; the limits
+        default to those of invariant_density for the same parameters.
+    """
+
+    xCover, yCover = cover_region(a, b)[1:]
+    if xLim is None: xLim = xCover
+    if yLim is None: yLim = yCover
+
+    fig = figure(figsize=(15,8))
+    frame = fig.add_subplot(1,1,1)
+
+    with np.errstate(divide="ignore"):
+        im = frame.imshow(np.log10(density), cmap=cm.inferno, origin="lower",
+                          extent=(*xLim, *yLim), aspect="auto")
+    fig.colorbar(im, label="$\\log_{10}$ probability")
+
+    frame.set_xlabel("$x$", fontsize=20)
+    frame.set_ylabel("$y$", fontsize=20)
+    frame.tick_params(axis="both", labelsize=15)
+
+    if saveFig: fig.savefig(str(saveFig))
+    else: show()
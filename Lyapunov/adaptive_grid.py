@@ -0,0 +1,197 @@
+from multiprocessing import Pool
+import numpy as np
+
+import full_henon as fh
+import lyapunov as ly
+import helper as he
+import create_grid as cg
+
+
+def lya_cell(a, b, nTot=1000, nCut=100):
+    """ Lyapunov exponents for a single parameter pair, using the same number
+        of iterations and starting point as 'create_grid.save_grid'. NaN is
+        returned for diverging orbits.
+    """
+
+    x, y = fh.Henon(0, 0, nTot, a, b, div=True)     # Iterating the map
+    if x is None: return np.nan, np.nan
+
+    return tuple(ly.Lyapunov(nTot-nCut, x[nCut:], a, b))
+
+
+def cell_centre(tree, level, i, j):
+    """ The a and b values at the centre of a cell of the tree """
+
+    n = tree["n0"] * 2**level                       # Cells per axis at level
+    aLim, bLim = tree["aLim"], tree["bLim"]
+
+    a = aLim[0] + (i + 0.5) * (aLim[1] - aLim[0]) / n
+    b = bLim[0] + (j + 0.5) * (bLim[1] - bLim[0]) / n
+
+    return a, b
+
+
+def evaluate_cells(tree, cells, nProc=1):
+    """ Compute the exponents and attractor type of a list of cells and store
+        them in the tree.
+    """
+
+    params = [cell_centre(tree, *cell) + (tree["nTot"], tree["nCut"])
+              for cell in cells]
+
+    if nProc > 1:
+        with Pool(nProc) as pool: lyas = pool.starmap(lya_cell, params)
+    else: lyas = [lya_cell(*p) for p in params]
+
+    for cell, lya in zip(cells, lyas):
+        tree["nodes"][cell] = (lya[0], lya[1], he.det_att(*lya))
+
+
+def lookup(tree, level, i, j):
+    """ Values of a cell, or of its smallest evaluated ancestor """
+
+    nodes = tree["nodes"]
+
+    while level >= 0:
+        if (level, i, j) in nodes: return nodes[(level, i, j)]
+        level, i, j = level-1, i // 2, j // 2
+
+    return None
+
+
+def needs_refinement(tree, cell, gradTol):
+    """ Function that checks whether a cell has to be refined. This is the
+        case if one of its four neighbours has a different type of attractor,
+        or if the maximal Lyapunov exponent differs by more than 'gradTol'.
+        Neighbours that have not been refined to the same level are
+        represented by their smallest evaluated ancestor.
+
+        Input:      tree    = the adaptive grid (dictionary);
+                    cell    = level and indices of the cell (tuple);
+                    gradTol = maximum difference in exponent (float);
+
+        Returns:    whether the cell has to be refined (boolean).
+    """
+
+    level, i, j = cell
+    n = tree["n0"] * 2**level
+    own = tree["nodes"][cell]
+
+    for di, dj in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+        ni, nj = i + di, j + dj
+        if ni < 0 or nj < 0 or ni >= n or nj >= n: continue
+
+        other = lookup(tree, level, ni, nj)
+        if other[2] != own[2]: return True                  # Type boundary
+        if abs(other[0] - own[0]) > gradTol: return True    # Large gradient
+
+    return False
+
+
+def refine_grid(aLim, bLim, n0=32, maxLevel=4, gradTol=0.1, nTot=1000,
+                nCut=100, nProc=1):
+    """ Function that samples the (a, b) parameter plane adaptively. First a
+        coarse grid of n0 x n0 cells is computed; each cell is classified
+        using 'helper.det_att'. Cells whose neighbours have a different type
+        of attractor, or whose maximal exponent changes by more than
+        'gradTol', are split into four and the children are computed. This
+        is repeated up to 'maxLevel' times, so the effective resolution along
+        the boundaries is n0 * 2**maxLevel while uniform regions stay coarse.
+
+        Input:      aLim     = lower and upper value of a (tuple);
+                    bLim     = lower and upper value of b (tuple);
+                    n0       = number of coarse cells along each axis (int);
+                    maxLevel = maximum number of refinements (int);
+                    gradTol  = maximum difference in exponent (float);
+                    nTot     = times the Hénon map will be iterated (int);
+                    nCut     = points that will be thrown away (int);
+                    nProc    = number of processes (int);
+
+        Returns:    tree     = the adaptive grid (dictionary).
+    """
+
+    tree = {"aLim": aLim, "bLim": bLim, "n0": n0, "nTot": nTot, "nCut": nCut,
+            "nodes": {}}
+
+    cells = [(0, i, j) for i in range(n0) for j in range(n0)]   # Coarse grid
+
+    for level in range(maxLevel+1):
+        print(f"Level {level}: computing {len(cells)} cells")
+        evaluate_cells(tree, cells, nProc)
+
+        if level == maxLevel: break
+
+        # Splitting the cells that lie on a boundary
+        flagged = [c for c in cells if needs_refinement(tree, c, gradTol)]
+        cells = [(level+1, 2*i+di, 2*j+dj) for (l, i, j) in flagged
+                 for di in (0, 1) for dj in (0, 1)]
+
+        if not cells: break
+
+    return tree
+
+
+def raster_tree(tree, aSize, bSize, value="type"):
+    """ Function that converts an adaptive grid into a regular grid of
+        arbitrary size. Each cell is painted onto the grid, coarse cells
+        first, so every pixel gets the value of the smallest cell covering it.
+        Rows correspond to a and columns to b, like 'save_grid'.
+
+        Input:      tree  = the adaptive grid (dictionary);
+                    aSize = number of rows of the grid (int);
+                    bSize = number of columns of the grid (int);
+                    value = "max", "min" or "type" (string);
+
+        Returns:    grid  = the regular grid (numpy array).
+    """
+
+    ind = {"max": 0, "min": 1, "type": 2}[value]
+    grid = np.full((aSize, bSize), np.nan)
+
+    for (level, i, j), vals in sorted(tree["nodes"].items()):
+        n = tree["n0"] * 2**level
+
+        r0, c0 = i * aSize // n, j * bSize // n
+        r1 = max((i+1) * aSize // n, r0+1)          # At least one pixel
+        c1 = max((j+1) * bSize // n, c0+1)
+
+        grid[r0:r1, c0:c1] = vals[ind]
+
+    return grid
+
+
+def save_tree(fname, tree):
+    """ Save an adaptive grid to a .npz file """
+
+    cells = np.asarray(list(tree["nodes"].keys()), dtype=int)
+    vals = np.asarray(list(tree["nodes"].values()), dtype=float)
+
+    np.savez(fname, cells=cells, vals=vals, aLim=tree["aLim"],
+             bLim=tree["bLim"], info=(tree["n0"], tree["nTot"], tree["nCut"]))
+
+
+def load_tree(fname):
+    """ Load an adaptive grid saved with 'save_tree' """
+
+    data = np.load(fname)
+    n0, nTot, nCut = data["info"]
+
+    nodes = {tuple(int(c) for c in cell): (v[0], v[1], int(v[2]))
+             for cell, v in zip(data["cells"], data["vals"])}
+
+    return {"aLim": tuple(data["aLim"]), "bLim": tuple(data["bLim"]),
+            "n0": int(n0), "nTot": int(nTot), "nCut": int(nCut),
+            "nodes": nodes}
+
+
+def plot_tree(tree, size, value="type", fname=None):
+    """ Plot an adaptive grid rasterised to size x size pixels """
+
+    grid = raster_tree(tree, size, size, value)
+
+    nTicks = 5
+    xL = list(np.round(np.linspace(*tree["bLim"], nTicks), 2))
+    yL = list(np.round(np.linspace(*tree["aLim"], nTicks), 2))
+    loc = list(np.linspace(0, size, nTicks))
+
+    cg.plot_grid(grid, xL, yL, loc, loc, fname)
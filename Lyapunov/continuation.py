@@ -0,0 +1,115 @@
+import numpy as np
+from matplotlib.pyplot import figure, show
+
+import lyapunov as ly
+import helper as he
+
+
+def hysteresis(vals, const, a=True, nIts=1000, nCut=100, warmCut=10, xS=0,
+               yS=0, tol=0.05):
+    """ Function that follows the attractor along a line in the parameter
+        space in both directions. The forward and backward sweep are done
+        together as an ensemble of two lines (see lyapunov.continue_lines).
+        Where the two sweeps end up on a different attractor, the type of
+        attractor or the largest exponent differs; this exposes hysteresis
+        and coexisting attractors that independent restarts miss.
+
+        Input:      vals     = values of the varied parameter (array-like);
+                    const    = value of the other parameter (float);
+                    a        = whether a (True) or b (False) is varied (boolean);
+                    nIts     = number of iterations that are averaged (int);
+                    nCut     = iterations thrown away for a cold start (int);
+                    warmCut  = iterations thrown away for a warm start (int);
+                    xS       = initial x condition (float);
+                    yS       = initial y condition (float);
+                    tol      = maximum difference in exponent (float);
+
+        Returns:    forward  = largest and smallest exponents of the forward
+                               sweep, shape (2, len(vals)) (numpy array);
+                    backward = the same for the backward sweep (numpy array);
+                    multi    = where the sweeps differ (numpy array).
+    """
+
+    vals = np.asarray(vals, dtype=float)
+    lines = np.vstack((vals, vals[::-1]))           # Forward and backward
+
+    if a: lyaMax, lyaMin = ly.continue_lines(lines, const, nIts, nCut, warmCut,
+                                             xS, yS)
+    else: lyaMax, lyaMin = ly.continue_lines(const, lines, nIts, nCut, warmCut,
+                                             xS, yS)
+
+    forward = np.vstack((lyaMax[0], lyaMin[0]))
+    backward = np.vstack((lyaMax[1][::-1], lyaMin[1][::-1]))
+
+    # Comparing the type of attractor and the largest exponent
+    types = he.det_att_grid(forward[0], forward[1])
+    typesBack = he.det_att_grid(backward[0], backward[1])
+    multi = (types != typesBack) | (np.abs(forward[0] - backward[0]) > tol)
+
+    return forward, backward, multi
+
+
+def bifurc_sweep(start, end, iterations, accuracy=1000, cut=950, warmCut=50,
+                 bvalue=0.3, backward=False):
+    """ Function that generates the data of the bifurcation diagram by
+        continuation in a; every value of a starts from the final point of
+        the previous value, so only 'warmCut' points have to be thrown away
+        instead of 'cut'. With 'backward' the values of a are traversed from
+        'end' to 'start'.
+
+        Input:  start      = lower boundary for "a" parameter value (float);
+                end        = upper boundary for "a" parameter value (float);
+                iterations = number of distinct "a" parameter values (int);
+                accuracy   = number of times the Hénon map is iterated (int);
+                cut        = iterated points thrown away for a cold start (int);
+                warmCut    = iterated points thrown away for a warm start (int);
+                bvalue     = value of the "b" parameter (float);
+                backward   = whether a is traversed backward (boolean);
+
+        Returns: apoints   = used "a" parameters (numpy array);
+                 xpoints   = x points with shape (iterations, accuracy-cut),
+                             NaN for diverging orbits (numpy array).
+    """
+
+    apoints = np.linspace(start, end, iterations)
+    order = apoints[::-1] if backward else apoints
+
+    # The exponents are not needed, so only a few iterations are averaged
+    lyaMax, lyaMin, xpoints = ly.continue_lines(order, bvalue, max(warmCut, 1),
+                                                cut, warmCut, keep=accuracy-cut)
+    xpoints = xpoints[0]
+
+    if backward: xpoints = xpoints[::-1]
+
+    return apoints, xpoints
+
+
+def plot_hysteresis(start, end, iterations, accuracy=1000, cut=950, warmCut=50,
+                    bvalue=0.3, saveFig=None):
+    """ Plot the bifurcation diagram of a forward and backward sweep """
+
+    apoints, forward = bifurc_sweep(start, end, iterations, accuracy, cut,
+                                    warmCut, bvalue)
+    apoints, backward = bifurc_sweep(start, end, iterations, accuracy, cut,
+                                     warmCut, bvalue, backward=True)
+
+    aGrid = np.broadcast_to(apoints[:,None], forward.shape)
+
+    # Plotting
+    fig = figure(figsize=(15,8))
+    frame = fig.add_subplot(1,1,1)
+
+    frame.scatter(aGrid, forward, s=0.05, color="navy", marker=".",
+                  label="Forward")
+    frame.scatter(aGrid, backward, s=0.05, color="crimson", marker=".",
+                  label="Backward")
+
+    frame.set_xlabel("$a$", fontsize=20)
+    frame.set_ylabel("$x$", fontsize=20)
+    frame.tick_params(axis="both", labelsize=15)
+
+    frame.legend(fontsize=20, markerscale=100)
+    frame.grid()
+
+    if saveFig: fig.savefig(str(saveFig))
+    else: show()
@@ -6,9 +6,11 @@ import lyapunov as ly
 import helper as he
 
 
-def save_grid(size, amin, amax, bmin, bmax, fmax, fmin):
+def save_grid(size, amin, amax, bmin, bmax, fmax, fmin, warm=False, warmCut=10):
     """ Saving Lyapunov exponents of the Hénon map for a range of values for the 
-        parameters a and b to a text file.
+        parameters a and b to a text file. If 'warm' is True each row is 
+        computed by continuation in b, all rows at once (see 
+        lyapunov.continue_lines); diverging orbits are saved as NaN.
     """
     
     grid_size = (size, size)                # Grid is square
@@ -22,12 +24,17 @@ def save_grid(size, amin, amax, bmin, bmax, fmax, fmin):
     Ncut = 100                              # Points that will be thrown away
     xStart = yStart = 0                     # Initial conditions
     
-    for aind, a in enumerate(a_vals):       # The a values and index
-        for bind, b in enumerate(b_vals):   # The b values and index
-            x,y = fh.Henon(xStart, yStart, Ntot, a, b)      # Iterating the map
-            Lexp = ly.Lyapunov(Ntot-Ncut, x[Ncut:], a, b)   # L.E.
-            lya_grid_max[aind][bind] = Lexp[0]              # Max L.E.
-            lya_grid_min[aind][bind] = Lexp[1]              # Min L.E.
+    if warm:
+        lya_grid_max, lya_grid_min = ly.continue_lines(a_vals[:,None], b_vals, 
+                                        Ntot-Ncut, Ncut, warmCut, xStart, yStart)
+    
+    else:
+        for aind, a in enumerate(a_vals):       # The a values and index
+            for bind, b in enumerate(b_vals):   # The b values and index
+                x,y = fh.Henon(xStart, yStart, Ntot, a, b)      # Iterating
+                Lexp = ly.Lyapunov(Ntot-Ncut, x[Ncut:], a, b)   # L.E.
+                lya_grid_max[aind][bind] = Lexp[0]              # Max L.E.
+                lya_grid_min[aind][bind] = Lexp[1]              # Min L.E.
     
     label = f"{amin} < a < {amax}, {bmin} < b < {bmax}"     # Header for table
     
@@ -85,50 +92,181 @@ def read_data(fname, size, comment="#", delimiter="|"):
                 
         return all_data
 
-def create_grid(fmax, fmin, frame_size, ystack):
-    """ Assumes frame is square. """
+def index_tiles(fname, comment="#"):
+    """ Function that finds the byte offset of every row of every table in a 
+        file written by 'save_grid', without reading the values themselves. 
+        The offsets can be used to seek directly to a single row of a single 
+        table later on.
+        
+        Input:      fname   = name of the file that will be indexed (string);
+                    comment = character that comments lines (string);
+                    
+        Returns:    offsets = byte offsets with shape (tables, rows) (numpy array).
+    """
+    
+    tables = []                                 # Row offsets for each table
+    rows = None                                 # Row offsets of current table
+    pos = 0                                     # Current byte position
+    
+    with open(fname, "rb") as f:
+        for line in f:
+            if line.startswith(comment.encode()):   # New table
+                rows = []
+                tables.append(rows)
+                
+            elif line.strip():                      # Row of the current table
+                if rows is None:
+                    rows = []
+                    tables.append(rows)
+                rows.append(pos)
+                
+            pos += len(line)
+    
+    return np.asarray(tables, dtype=np.int64)
+
+
+def open_mosaic(fnames, frame_size, ystack, xsize=1, comment="#"):
+    """ Function that presents the tables stored in one or more files as one 
+        virtual 2D grid. Within a file the frames are ordered the same way as 
+        in 'create_grid': frame k is placed in column k // ystack and row 
+        k % ystack. Multiple files are ordered the same way as in 
+        'comb_multiple': file f is placed in row f // xsize and column 
+        f % xsize. Only the row offsets are stored, no values are loaded.
+        
+        Input:      fnames     = name(s) of the file(s) (string or list);
+                    frame_size = number of rows and columns of a frame (int);
+                    ystack     = number of frames stacked vertically (int);
+                    xsize      = number of files next to each other (int);
+                    comment    = character that comments lines (string);
+                    
+        Returns:    mosaic     = description of the virtual grid (dictionary).
+    """
+    
+    if isinstance(fnames, str): fnames = [fnames]
+    
+    fileOffsets = [index_tiles(fname, comment) for fname in fnames]
+    fileCols = max(len(offs) for offs in fileOffsets) // ystack
+    fileRows = int(np.ceil(len(fnames) / xsize))
+    
+    # Tile locations, -1 if there is no tile at that position
+    tRows, tCols = fileRows * ystack, xsize * fileCols
+    offsets = np.full((tRows, tCols, frame_size), -1, dtype=np.int64)
+    files = np.full((tRows, tCols), -1, dtype=int)
+    
+    for fInd, offs in enumerate(fileOffsets):
+        fRow, fCol = divmod(fInd, xsize)            # Position of the file
+        
+        for k in range(len(offs)):
+            row = fRow * ystack + k % ystack        # Position of the frame
+            col = fCol * fileCols + k // ystack
+            
+            offsets[row, col] = offs[k]
+            files[row, col] = fInd
+    
+    mosaic = {"fnames": list(fnames), "size": frame_size, "offsets": offsets, 
+              "files": files, "shape": (tRows*frame_size, tCols*frame_size)}
+    
+    return mosaic
+
+
+def read_window(mosaic, rows=None, cols=None, step=1, delimiter="|"):
+    """ Function that reads part of a virtual grid created by 'open_mosaic'. 
+        Only the rows of the tiles that intersect the requested window are 
+        read, and only every 'step'th row and column is kept; so an overview 
+        of a huge grid can be made without loading the whole grid. Missing 
+        tiles are filled with NaN.
+        
+        Input:      mosaic    = the virtual grid (dictionary);
+                    rows      = first and last row of the window (tuple);
+                    cols      = first and last column of the window (tuple);
+                    step      = downsample factor (int);
+                    delimiter = character that separate values (string);
+                    
+        Returns:    window    = the values inside the window (numpy array).
+    """
+    
+    size = mosaic["size"]
+    offsets, files = mosaic["offsets"], mosaic["files"]
+    
+    if rows is None: rows = (0, mosaic["shape"][0])
+    if cols is None: cols = (0, mosaic["shape"][1])
+    
+    rowInds = np.arange(rows[0], rows[1], step)     # Rows that will be read
+    colInds = np.arange(cols[0], cols[1], step)     # Columns that will be kept
+    window = np.full((len(rowInds), len(colInds)), np.nan)
+    
+    # Tile columns intersecting the window and the columns kept from each
+    tileCols = [(tCol, colInds // size == tCol) for tCol in 
+                np.unique(colInds // size)]
+    tileCols = [(tCol, sel, colInds[sel] % size) for tCol, sel in tileCols]
+    
+    delim = delimiter.encode()
+    handles = [None for fname in mosaic["fnames"]]
     
-    max_generated = read_data(fmax, frame_size)     # Max L.E.
-    min_generated = read_data(fmin, frame_size)     # Min L.E.
-    type_gen = he.array_att(max_generated, min_generated, frame_size)   # Types
+    try:
+        for outRow, row in enumerate(rowInds):
+            tRow, local = divmod(row, size)         # Tile row and local row
+            
+            for tCol, sel, localCols in tileCols:
+                fInd = files[tRow, tCol]
+                if fInd < 0: continue               # Missing tile
+                
+                if handles[fInd] is None:
+                    handles[fInd] = open(mosaic["fnames"][fInd], "rb")
+                
+                f = handles[fInd]
+                f.seek(offsets[tRow, tCol, local])
+                vals = np.asarray(f.readline().split(delim), dtype=float)
+                
+                window[outRow, sel] = vals[localCols]
     
-        # Concatenate separate frames in right order and shape
-    all_colls = [np.concatenate
-                (type_gen[row*ystack:(row+1)*ystack], axis = 0) 
-                for row in range(ystack)]
+    finally:
+        for f in handles:
+            if f is not None: f.close()
     
-    max_gen = [np.concatenate
-              (max_generated[row*ystack:(row+1)*ystack], axis = 0)
-              for row in range(ystack)]
+    return window
+
+
+def overview(mosaic, maxSize=1000, delimiter="|"):
+    """ Downsampled view of the full virtual grid, at most 'maxSize' pixels 
+        along each axis.
+    """
+    
+    step = int(np.ceil(max(mosaic["shape"]) / maxSize))
+    return read_window(mosaic, step=step, delimiter=delimiter)
+
+
+def create_grid(fmax, fmin, frame_size, ystack, rows=None, cols=None, step=1):
+    """ Assumes frame is square. The optional 'rows', 'cols' and 'step' select 
+        a (downsampled) window of the full grid, see 'read_window'. 
+    """
     
-    min_gen = [np.concatenate
-              (min_generated[row*ystack:(row+1)*ystack], axis = 0)
-              for row in range(ystack)]
+    max_mosaic = open_mosaic(fmax, frame_size, ystack)  # Max L.E.
+    min_mosaic = open_mosaic(fmin, frame_size, ystack)  # Min L.E.
     
-    tot_generated = np.hstack(tuple(all_colls))
-    tot_max = np.hstack(tuple(max_gen))
-    tot_min = np.hstack(tuple(min_gen))
+    tot_max = read_window(max_mosaic, rows, cols, step)
+    tot_min = read_window(min_mosaic, rows, cols, step)
+    tot_generated = he.det_att_grid(tot_max, tot_min)   # Types
     
     return tot_max, tot_min, tot_generated
 
 
-def comb_multiple(max_fnames, min_fnames, xsize, frame_size, av, bv, numb):
+def comb_multiple(max_fnames, min_fnames, xsize, frame_size, av, bv, numb, 
+                  maxSize=None):
     """ Combining multiple different grids of Lyapunov exponents into one big 
-        grid 
+        grid. File f is placed in row f // xsize and column f % xsize. If 
+        'maxSize' is given only a downsampled overview is read.
     """
     
-    cR = [[create_grid(max_fnames[ind], min_fnames[ind], frame_size, numb)[-1]] 
-           for ind in range(len(max_fnames))]
+    max_mosaic = open_mosaic(max_fnames, frame_size, numb, xsize)
+    min_mosaic = open_mosaic(min_fnames, frame_size, numb, xsize)
     
-    # Creating the three different "y grids", so yColumn consists of 3 arrays,
-    # each containing a third of the grid. The first array the left most side, 
-    # the second array the middle part, and the last array the right side
-    yColumn = [np.concatenate(
-              (np.vstack((cR[:xsize]))[x], np.vstack((cR[xsize:]))[x]), axis=0) 
-              for x in range(xsize)]
+    step = 1
+    if maxSize: step = int(np.ceil(max(max_mosaic["shape"]) / maxSize))
     
-    # Combining the three different parts
-    fullConc = np.concatenate(([col for col in yColumn]), axis=1)
+    maxVals = read_window(max_mosaic, step=step)
+    minVals = read_window(min_mosaic, step=step)
+    fullConc = he.det_att_grid(maxVals, minVals)
     
     # Ticks, a on y-axis, b on x-axis
     xLen, xNum = len(fullConc[0]), 11
@@ -0,0 +1,139 @@
+from multiprocessing import Pool
+import numpy as np
+from matplotlib.pyplot import figure, show, cm
+
+import divergence as dv
+
+
+def ftle_tile(xS, yS, nIts, a, b, renorm=10):
+    """ Function that calculates the finite-time largest Lyapunov exponent
+        for a set of initial conditions. Every orbit carries the product
+        M = J_n ... J_1 of its Jacobian matrices, which is scaled back every
+        'renorm' steps while the logarithm of the scale is stored. The
+        exponent is log(sigma) / nIts, with sigma the largest singular value
+        of the product. Orbits that provably escape (see
+        divergence.escape_radius) are dropped from the ensemble.
+
+        Input:      xS     = initial x conditions (numpy array);
+                    yS     = initial y conditions (numpy array);
+                    nIts   = number of iterations (int);
+                    a      = a parameter of the Hénon map (float);
+                    b      = b parameter of the Hénon map (float);
+                    renorm = number of steps between rescaling (int);
+
+        Returns:    ftle   = the exponents, NaN for escaping orbits (array);
+                    basin  = whether the orbit did not escape (numpy array).
+    """
+
+    shape = np.shape(xS)
+    x, y = np.ravel(xS).astype(float), np.ravel(yS).astype(float)
+
+    ind = np.arange(len(x))                         # Orbits still iterated
+    m11, m12 = np.ones(len(x)), np.zeros(len(x))    # Tangent matrix
+    m21, m22 = np.zeros(len(x)), np.ones(len(x))
+    logScale = np.zeros(len(x))
+
+    R = dv.escape_radius(a, b)
+
+    with np.errstate(over="ignore", invalid="ignore"):
+        for n in range(nIts):
+            # Multiplying with the Jacobian [[-2ax, 1], [b, 0]]
+            dx = -2 * a * x
+            m11, m12, m21, m22 = dx*m11 + m21, dx*m12 + m22, b*m11, b*m12
+
+            x, y = y + 1 - a * x * x, b * x         # Hénon map
+
+            if n % renorm == renorm-1 or n == nIts-1:
+                scale = np.maximum.reduce([np.abs(m11), np.abs(m12),
+                                           np.abs(m21), np.abs(m22)])
+                scale = np.maximum(scale, 1e-300)
+                m11, m12, m21, m22 = m11/scale, m12/scale, m21/scale, m22/scale
+                logScale += np.log(scale)
+
+            # Dropping the orbits that escape
+            esc = ~np.isfinite(x) | ((np.abs(x) > R) &
+                                     (np.abs(y) <= np.abs(b * x)))
+            if esc.any():
+                keep = ~esc
+                x, y, ind, logScale = x[keep], y[keep], ind[keep], logScale[keep]
+                m11, m12, m21, m22 = m11[keep], m12[keep], m21[keep], m22[keep]
+
+    # Largest singular value of the 2x2 matrices
+    frob = m11*m11 + m12*m12 + m21*m21 + m22*m22
+    det = m11*m22 - m12*m21
+    sigma = np.sqrt((frob + np.sqrt(np.maximum(frob*frob - 4*det*det, 0))) / 2)
+
+    ftle = np.full(np.size(xS), np.nan)
+    ftle[ind] = (logScale + np.log(sigma)) / nIts
+
+    basin = np.zeros(np.size(xS), dtype=bool)
+    basin[ind] = True
+
+    return ftle.reshape(shape), basin.reshape(shape)
+
+
+def ftle_field(xVals, yVals, xSize, ySize, nIts=20, a=1.4, b=0.3, nProc=1,
+               tileRows=64):
+    """ Function that creates a phase space map of the finite-time largest
+        Lyapunov exponent together with the basin of attraction. The grid
+        is split into tiles of 'tileRows' rows which are divided over
+        'nProc' processes; within a tile all pixels are iterated together.
+        As in trapping.basin_attr the first row belongs to the largest y.
+
+        Input:      xVals    = lower and upper x value (tuple);
+                    yVals    = lower and upper y value (tuple);
+                    xSize    = number of x pixels (int);
+                    ySize    = number of y pixels (int);
+                    nIts     = number of iterations (int);
+                    a        = a parameter of the Hénon map (float);
+                    b        = b parameter of the Hénon map (float);
+                    nProc    = number of processes (int);
+                    tileRows = number of rows per tile (int);
+
+        Returns:    ftle     = the exponents, shape (ySize, xSize), NaN for
+                               escaping orbits (numpy array);
+                    basin    = 1 for orbits that do not escape (numpy array).
+    """
+
+    xRange = np.linspace(xVals[0], xVals[1], xSize)
+    yRange = np.linspace(yVals[1], yVals[0], ySize)
+
+    tasks = []
+    for start in range(0, ySize, tileRows):
+        xGrid, yGrid = np.meshgrid(xRange, yRange[start:start+tileRows])
+        tasks.append((xGrid, yGrid, nIts, a, b))
+
+    if nProc > 1:
+        with Pool(nProc) as pool: tiles = pool.starmap(ftle_tile, tasks)
+    else:
+        tiles = [ftle_tile(*task) for task in tasks]
+
+    ftle = np.vstack([tile[0] for tile in tiles])
+    basin = np.vstack([tile[1] for tile in tiles]).astype(float)
+
+    return ftle, basin
+
+
+def plot_ftle(xVals=(-2, 2), yVals=(-3, 5), xSize=1920, ySize=1080, nIts=20,
+              a=1.4, b=0.3, nProc=1, saveFig=None):
+    """ Plot the finite-time Lyapunov exponent field, escaping orbits are
+        white.
+    """
+
+    ftle, basin = ftle_field(xVals, yVals, xSize, ySize, nIts, a, b, nProc)
+
+    cmap = cm.viridis.copy()
+    cmap.set_bad("white")
+
+    fig = figure(figsize=(15,8))
+    frame = fig.add_subplot(1,1,1)
+
+    im = frame.imshow(ftle, cmap=cmap, extent=(*xVals, *yVals), aspect="auto")
+    fig.colorbar(im, label=f"$\\lambda_{{{nIts}}}$")
+
+    frame.set_xlabel("$x_0$", fontsize=20)
+    frame.set_ylabel("$y_0$", fontsize=20)
+    frame.tick_params(axis="both", labelsize=15)
+
+    if saveFig: fig.savefig(str(saveFig))
+    else: show()
@@ -3,6 +3,7 @@ import numpy as np
 from matplotlib.pyplot import figure, savefig, show
 
 import full_henon as fh
+import cache as ca
 
 
 def norm_vect(vector):
@@ -85,32 +86,158 @@ def Lyapunov(N, xvalues, A, B):
     
     return lya
 
-def plot_1D(vals, const, nIts, nCut, a=True, plotMin=False, saveFig=None):
-    """ Plotting the Lyapunov exponents for varying the parameter a or b """
+def lya_ensemble(xS, yS, nIts, a, b, nCut=100, threshold=1e3):
+    """ Function that calculates the Lyapunov exponents of many orbits at once; 
+        the starting points and parameters can be arrays (of the same shape) 
+        or numbers. All orbits are iterated together with their tangent 
+        vector. Every orbit first throws away its own 'nCut' iterations and 
+        then averages the growth of the tangent vector over 'nIts' 
+        iterations. For a 2D map the sum of the exponents is log|b| (the 
+        determinant of the Jacobian), so only the largest exponent has to be 
+        tracked. Orbits that exceed 'threshold' are stopped and get NaN.
+        
+        Input:  xS        = initial x conditions (float or array);
+                yS        = initial y conditions (float or array);
+                nIts      = number of iterations that are averaged (int);
+                a         = value(s) for parameter a (float or array);
+                b         = value(s) for parameter b (float or array);
+                nCut      = iterations thrown away (int or array);
+                threshold = maximum value of x or y (float);
+        
+        Returns:lyaMax    = largest Lyapunov exponents (numpy array);
+                lyaMin    = smallest Lyapunov exponents (numpy array);
+                x         = final x values of the orbits (numpy array);
+                y         = final y values of the orbits (numpy array).
+    """
+    
+    xS, yS, a, b, nCut = np.broadcast_arrays(xS, yS, a, b, nCut)
+    x, y = xS.astype(float), yS.astype(float)       # Copies of the start
+    a, b, nCut = a.astype(float), b.astype(float), nCut.astype(int)
+    
+    ux, uy = np.ones(x.shape), np.zeros(x.shape)    # Tangent vector
+    logSum = np.zeros(x.shape)                      # Sum of log(growth)
+    alive = np.ones(x.shape, dtype=bool)            # Not diverged
+    
+    for n in range(nIts + np.max(nCut, initial=0)):
+        # Applying the Jacobian [[-2ax, 1], [b, 0]] to the tangent vector
+        vx = -2 * a * x * ux + uy
+        vy = b * ux
+        norm = np.maximum(np.hypot(vx, vy), 1e-300)
+        
+        count = (n >= nCut) & (n < nCut + nIts)     # Outside transient
+        logSum += np.where(count, np.log(norm), 0)
+        ux, uy = vx / norm, vy / norm
+        
+        x, y = y + 1 - a * x * x, b * x             # Hénon map
+        
+        alive &= (np.abs(x) <= threshold) & (np.abs(y) <= threshold)
+        x, y = np.where(alive, x, 0), np.where(alive, y, 0)  # No overflow
+    
+    lyaMax = np.where(alive, logSum / nIts, np.nan)
+    with np.errstate(divide="ignore"):
+        lyaMin = np.where(alive, np.log(np.abs(b)) - lyaMax, np.nan)
+    
+    return lyaMax, lyaMin, x, y
+
+def continue_lines(aVals, bVals, nIts, nCut=100, warmCut=10, xS=0, yS=0, 
+                   keep=0):
+    """ Function that calculates the Lyapunov exponents along one or more lines 
+        in the parameter space by continuation. Each row of aVals and bVals 
+        is a line; all lines are iterated together as one ensemble. The 
+        first value of a line starts at (xS, yS) and throws away 'nCut' 
+        iterations; every next value starts from the final point of the 
+        previous value and only throws away 'warmCut' iterations. After a 
+        diverging orbit the line starts again at (xS, yS). Optionally the 
+        next 'keep' x values of every orbit are stored as well.
+        
+        Input:  aVals   = a values with shape (lines, steps) (array-like);
+                bVals   = b values with shape (lines, steps) (array-like);
+                nIts    = number of iterations that are averaged (int);
+                nCut    = iterations thrown away for a cold start (int);
+                warmCut = iterations thrown away for a warm start (int);
+                xS      = initial x condition (float);
+                yS      = initial y condition (float);
+                keep    = number of x values stored per orbit (int);
+        
+        Returns:lyaMax  = largest exponents, shape (lines, steps) (numpy array);
+                lyaMin  = smallest exponents, shape (lines, steps) (numpy array);
+                optional: kept = x values, shape (lines, steps, keep), NaN 
+                          for diverging orbits (numpy array).
+    """
+    
+    aVals, bVals = np.broadcast_arrays(np.atleast_2d(aVals), 
+                                       np.atleast_2d(bVals))
+    nLines, steps = aVals.shape
+    
+    lyaMax, lyaMin = np.zeros((nLines, steps)), np.zeros((nLines, steps))
+    kept = np.full((nLines, steps, keep), np.nan)
+    
+    x, y = np.full(nLines, float(xS)), np.full(nLines, float(yS))
+    cut = np.full(nLines, nCut)
+    
+    for ind in range(steps):
+        a, b = aVals[:,ind], bVals[:,ind]
+        lyaMax[:,ind], lyaMin[:,ind], x, y = lya_ensemble(x, y, nIts, a, b, 
+                                                          cut)
+        cold = np.isnan(lyaMax[:,ind])              # Diverged
+        
+        with np.errstate(over="ignore", invalid="ignore"):
+            for k in range(keep):
+                x, y = y + 1 - a * x * x, b * x
+                kept[:,ind,k] = np.where(cold, np.nan, x)
+        
+        # Warm start, unless the orbit diverged
+        x, y = np.where(cold, xS, x), np.where(cold, yS, y)
+        cut = np.where(cold, nCut, warmCut)
+    
+    if keep: return lyaMax, lyaMin, kept
+    return lyaMax, lyaMin
+
+def lya_orbit(xs, ys, nIts, nCut, a, b):
+    """ Lyapunov exponents of the orbit starting at (xs, ys) """
+    
+    x, y = fh.Henon(xs, ys, nIts, a, b)
+    return Lyapunov(nIts-nCut, x[nCut:], a, b)
+
+def plot_1D(vals, const, nIts, nCut, a=True, plotMin=False, saveFig=None, 
+            cache=False, warm=False, warmCut=10):
+    """ Plotting the Lyapunov exponents for varying the parameter a or b. If 
+        'cache' is True the exponents are stored on disk and reused. If 
+        'warm' is True every value starts from the final point of the 
+        previous value and only throws away 'warmCut' points (see 
+        'continue_lines'); with 'cache' the whole sweep is then stored as 
+        one entry.
+    """
     
     lyaMin, lyaMax = [], []
     xs, ys = 0, 0                               # Initial conditions
     
+    if cache: call = ca.cached_call
+    else: call = lambda func, *args: func(*args)
+    
     # Initializing the plot
     fig = figure(figsize=(15,8))
     frame = fig.add_subplot(1,1,1)
     
-    for ind, val in enumerate(vals):
-        if a:                                           # If b is kept constant
-            x, y = fh.Henon(xs, ys, nIts, val, const)
-            Lexp = Lyapunov(nIts-nCut, x[nCut:], val, const)
-            
-            frame.set_xlabel("a", fontsize=20)
-            
-        else:                                           # If a is kept constant
-            x, y = fh.Henon(xs, ys, nIts, const, val)
-            Lexp = Lyapunov(nIts-nCut, x[nCut:], const, val)
+    if a: frame.set_xlabel("a", fontsize=20)
+    else: frame.set_xlabel("b", fontsize=20)
+    
+    if warm:
+        aVals, bVals = (vals, const) if a else (const, vals)
+        lyaMax, lyaMin = call(continue_lines, aVals, bVals, nIts-nCut, nCut, 
+                              warmCut, xs, ys)
+        lyaMax, lyaMin = lyaMax[0], lyaMin[0]
+    
+    else:
+        for ind, val in enumerate(vals):
+            if a:                                       # If b is kept constant
+                Lexp = call(lya_orbit, xs, ys, nIts, nCut, val, const)
+            else:                                       # If a is kept constant
+                Lexp = call(lya_orbit, xs, ys, nIts, nCut, const, val)
             
-            frame.set_xlabel("b", fontsize=20)
-        
-        # Adding the exponents to the lists
-        lyaMax.append(Lexp[0])
-        lyaMin.append(Lexp[1])
+            # Adding the exponents to the lists
+            lyaMax.append(Lexp[0])
+            lyaMin.append(Lexp[1])
     
     frame.plot(vals, lyaMax, color="darkblue", lw=0.8)
     if plotMin: frame.plot(vals, lyaMin, color="crimson", lw=0.8)
@@ -0,0 +1,209 @@
+import numpy as np
+from matplotlib.pyplot import figure, show
+
+import lyapunov as ly
+
+
+def ensemble_states(aVals, bVals, nStart=64, nIts=1000, nCut=500, keep=64,
+                    xLim=(-1.33, 1.32), yLim=(-0.5, 0.42), seed=0):
+    """ Function that iterates 'nStart' random initial conditions for every
+        parameter pair as one ensemble (see lyapunov.lya_ensemble), and then
+        stores the next 'keep' x values of every orbit. The initial
+        conditions are drawn uniformly from the box xLim x yLim, which by
+        default is the box around the trapping region.
+
+        Input:      aVals  = a values (array-like);
+                    bVals  = b values, same shape as aVals (array-like);
+                    nStart = number of initial conditions per pair (int);
+                    nIts   = number of iterations that are averaged (int);
+                    nCut   = iterations thrown away (int);
+                    keep   = number of x values stored per orbit (int);
+                    xLim   = range of the initial x conditions (tuple);
+                    yLim   = range of the initial y conditions (tuple);
+                    seed   = seed of the initial conditions (int);
+
+        Returns:    lyaMax = largest exponents, shape (pairs, nStart) (array);
+                    lyaMin = smallest exponents (numpy array);
+                    window = x values, shape (pairs, nStart, keep), NaN for
+                             diverging orbits (numpy array).
+    """
+
+    aVals, bVals = np.broadcast_arrays(np.ravel(aVals), np.ravel(bVals))
+    shape = (len(aVals), nStart)
+
+    rng = np.random.default_rng(seed)
+    xS = rng.uniform(xLim[0], xLim[1], shape)
+    yS = rng.uniform(yLim[0], yLim[1], shape)
+    a = np.broadcast_to(aVals[:,None], shape)
+    b = np.broadcast_to(bVals[:,None], shape)
+
+    lyaMax, lyaMin, x, y = ly.lya_ensemble(xS, yS, nIts, a, b, nCut)
+    dead = np.isnan(lyaMax)
+
+    window = np.full(shape + (keep,), np.nan)
+    with np.errstate(over="ignore", invalid="ignore"):
+        for k in range(keep):
+            x, y = y + 1 - a * x * x, b * x
+            window[...,k] = np.where(dead, np.nan, x)
+
+    return lyaMax, lyaMin, window
+
+
+def find_period(window, maxPeriod=16, tol=1e-6):
+    """ Function that finds the period of many orbits at once from their
+        stored x values; the period is the smallest p for which every x
+        value equals the one p steps earlier within 'tol'. Orbits without
+        such a period (chaotic or quasi-periodic) get period 0.
+
+        Input:      window    = x values, the last axis is time (numpy array);
+                    maxPeriod = largest period that is checked (int);
+                    tol       = maximum difference of periodic points (float);
+
+        Returns:    period    = the periods (numpy array).
+    """
+
+    period = np.zeros(window.shape[:-1], dtype=int)
+
+    with np.errstate(invalid="ignore"):
+        for p in range(min(maxPeriod, window.shape[-1]-1), 0, -1):
+            match = np.all(np.abs(window[...,p:] - window[...,:-p]) < tol,
+                           axis=-1)
+            period[match] = p                       # Smallest period remains
+
+    return period
+
+
+def cluster_orbits(group, stable, low, high):
+    """ Function that clusters orbits into attractors. Every orbit covers
+        an interval [low, high] of x values; orbits belong to the same
+        attractor when they share the group (parameter pair) and are both
+        stable or both chaotic, and their intervals overlap, possibly
+        through a chain of other orbits. The period itself is not used, as
+        close to a bifurcation orbits on one attractor converge too slowly
+        to agree on it. The intervals are sorted with one np.lexsort over all
+        orbits, and a new attractor starts wherever an interval begins after
+        the end of all previous intervals.
+
+        Input:      group  = group of every orbit (numpy array);
+                    stable = whether the orbit is stable (numpy array);
+                    low    = lower end of the intervals (numpy array);
+                    high   = upper end of the intervals (numpy array);
+
+        Returns:    labels = attractor label of every orbit, -1 for
+                             diverging orbits (numpy array).
+    """
+
+    group, stable = np.ravel(group), np.ravel(stable)
+    low, high = np.ravel(low), np.ravel(high)
+
+    order = np.lexsort((low, stable, group))
+    order = order[np.isfinite(low[order])]
+
+    # Each run of equal group and stability is shifted above the previous
+    # one, so one running maximum serves all runs
+    run = np.cumsum(np.append(True, (np.diff(group[order]) != 0) |
+                              (np.diff(stable[order]) != 0)))
+    shift = 10 * (np.max(np.abs(high[order]), initial=0) + 1) * run
+    reach = np.maximum.accumulate(high[order] + shift)
+
+    new = np.ones(len(order), dtype=bool)
+    new[1:] = low[order][1:] + shift[1:] > reach[:-1]
+
+    labels = np.full(len(low), -1)
+    labels[order] = np.cumsum(new) - 1
+
+    return labels
+
+
+def multistability(aVals, bVals, nStart=64, nIts=1000, nCut=500, keep=128,
+                   maxPeriod=16, tol=1e-6, clusterTol=1e-2, lyaTol=0.01, seed=0):
+    """ Function that finds the coexisting attractors for one or more
+        parameter pairs. For every pair 'nStart' initial conditions are
+        iterated as one ensemble and the final states are clustered (see
+        cluster_orbits). Orbits with a largest exponent below 'lyaTol' are
+        stable; they are identified by the smallest x of their window,
+        which for a periodic orbit is a point of the cycle. Chaotic orbits
+        are identified by the range of x values of their window.
+
+        Input:      aVals      = a values (array-like);
+                    bVals      = b values, same shape as aVals (array-like);
+                    nStart     = number of initial conditions per pair (int);
+                    nIts       = number of iterations that are averaged (int);
+                    nCut       = iterations thrown away (int);
+                    keep       = number of x values stored per orbit (int);
+                    maxPeriod  = largest period that is detected (int);
+                    tol        = accuracy of periodic points (float);
+                    clusterTol = resolution for stable attractors (float);
+                    lyaTol     = largest exponent of a stable orbit (float);
+                    seed       = seed of the initial conditions (int);
+
+        Returns:    attrs      = one row (pair index, period, smallest x, mean
+                                 largest exponent, basin fraction) per
+                                 attractor, period 0 if no period is
+                                 detected (numpy array);
+                    nAttr      = number of attractors per pair (numpy array);
+                    escape     = fraction of diverging orbits per pair (array).
+    """
+
+    lyaMax, lyaMin, window = ensemble_states(aVals, bVals, nStart, nIts, nCut,
+                                             keep, seed=seed)
+    nPairs = len(lyaMax)
+
+    period = find_period(window, maxPeriod, tol)
+    value = np.min(window, axis=-1)
+
+    stable = lyaMax < lyaTol
+    high = np.where(stable, value + clusterTol, np.max(window, axis=-1))
+
+    group = np.broadcast_to(np.arange(nPairs)[:,None], period.shape)
+    labels = cluster_orbits(group, stable, value, high)
+
+    labels = labels.reshape(period.shape)
+    valid = labels >= 0
+
+    # Properties of every attractor
+    found, first, counts = np.unique(labels[valid], return_index=True,
+                                     return_counts=True)
+    meanLya = np.bincount(labels[valid], lyaMax[valid]) / counts
+
+    attrPeriod = np.zeros(len(found), dtype=int)
+    np.maximum.at(attrPeriod, labels[valid], period[valid])
+
+    attrs = np.column_stack((group[valid][first], attrPeriod,
+                             value[valid][first], meanLya, counts / nStart))
+
+    nAttr = np.bincount(group[valid][first], minlength=nPairs)
+    escape = 1 - np.sum(valid, axis=1) / nStart
+
+    return attrs, nAttr, escape
+
+
+def plot_multistability(vals, const, a=True, nStart=64, nIts=1000, nCut=500,
+                        saveFig=None, **kwargs):
+    """ Plot the number of coexisting attractors along a line in the
+        parameter space.
+    """
+
+    vals = np.asarray(vals, dtype=float)
+
+    if a: attrs, nAttr, escape = multistability(vals, const, nStart, nIts, nCut,
+                                                **kwargs)
+    else: attrs, nAttr, escape = multistability(const, vals, nStart, nIts,
+                                                nCut, **kwargs)
+
+    fig = figure(figsize=(15,8))
+    frame = fig.add_subplot(1,1,1)
+
+    frame.step(vals, nAttr, where="mid", color="navy", lw=2,
+               label="Attractors")
+    frame.plot(vals, escape, color="crimson", lw=1.5, label="Escape fraction")
+
+    frame.set_xlabel("$a$" if a else "$b$", fontsize=20)
+    frame.set_ylabel("Number of attractors", fontsize=20)
+    frame.tick_params(axis="both", labelsize=15)
+
+    frame.legend(fontsize=15)
+    frame.grid()
+
+    if saveFig: fig.savefig(str(saveFig))
+    else: show()